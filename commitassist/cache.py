@@ -0,0 +1,155 @@
+"""
+Suggestion Cache for Commit Assistant
+
+This module stores generated commit messages keyed on the content of the
+request that produced them (staged diff, system prompt, model, temperature
+and number of suggestions). Asking again for the same staged changes
+returns the saved messages instead of calling the OpenAI API.
+
+Each request is stored in its own file, ~/.commit-assistant/cache/<key>.json,
+so a lookup reads only the entry it needs.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+
+
+# Maximum number of cached requests kept on disk
+MAX_ENTRIES = 200
+
+
+def make_cache_key(diff, system_message, model, temperature, count=1):
+    """
+    Build the cache key for a suggestion request.
+    
+    Args:
+        diff (str): The git diff text
+        system_message (str): The system prompt sent to the model
+        model (str): Name of the OpenAI model
+        temperature (float): Sampling temperature
+        count (int): Number of suggestions requested
+    
+    Returns:
+        str: Hex digest identifying the request
+    """
+    # Feed the parts one at a time rather than copying the diff into a
+    # concatenated payload; NUL separators keep the fields unambiguous
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(diff.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(system_message.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(model.encode('utf-8'))
+    # Two decimals keeps the regenerate temperature steps apart
+    digest.update(f"\0{round(temperature, 2)}\0{count}".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def get_cached_messages(key):
+    """
+    Look up previously generated messages.
+    
+    Args:
+        key (str): Cache key from make_cache_key()
+    
+    Returns:
+        list: The cached messages, or None if there is no entry
+    """
+    entry_path = _get_entry_path(key)
+    try:
+        with open(entry_path, 'r', encoding='utf-8') as f:
+            messages = json.load(f)
+    except (OSError, ValueError):
+        return None
+    
+    if not isinstance(messages, list):
+        return None
+    
+    # Touch the entry so it is evicted last
+    try:
+        os.utime(entry_path)
+    except OSError:
+        pass
+    return messages
+
+
+def store_messages(key, messages):
+    """
+    Save generated messages, evicting the least recently used entries.
+    Failures are ignored because the cache is only an optimization.
+    
+    Args:
+        key (str): Cache key from make_cache_key()
+        messages (list): The generated commit messages
+    """
+    # The messages describe private code, so only the owner may read them.
+    # mkstemp creates the entry 0600 under a unique name
+    entry_path = _get_entry_path(key)
+    try:
+        os.makedirs(_get_cache_dir(), mode=0o700, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=key + '.', suffix='.tmp', dir=_get_cache_dir())
+    except OSError:
+        return
+    
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(messages, f)
+        os.replace(tmp_path, entry_path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return
+    
+    _trim_entries()
+
+
+# Private helper functions
+
+def _get_cache_dir():
+    """
+    Get the path to the cache directory.
+    
+    Returns:
+        str: Path to the cache directory
+    """
+    home_dir = os.path.expanduser("~")
+    return os.path.join(home_dir, '.commit-assistant', 'cache')
+
+
+def _get_entry_path(key):
+    """
+    Get the path of the file holding one cache entry.
+    
+    Args:
+        key (str): Cache key from make_cache_key()
+    
+    Returns:
+        str: Path to the entry file
+    """
+    return os.path.join(_get_cache_dir(), key + '.json')
+
+
+def _trim_entries():
+    """
+    Delete the least recently used entries beyond MAX_ENTRIES.
+    """
+    try:
+        with os.scandir(_get_cache_dir()) as it:
+            entries = [(entry.stat().st_mtime_ns, entry.path)
+                       for entry in it if entry.name.endswith('.json')]
+    except OSError:
+        return
+    
+    if len(entries) <= MAX_ENTRIES:
+        return
+    
+    entries.sort()
+    for _, path in entries[:len(entries) - MAX_ENTRIES]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
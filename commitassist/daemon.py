@@ -0,0 +1,264 @@
+"""
+Suggestion Daemon for Commit Assistant
+
+This module runs an optional background server that keeps the OpenAI client
+(and its open HTTPS connection) alive between commands, so repeated runs skip
+importing the SDK and the TLS handshake. Commands send one JSON request per
+connection over a Unix socket in the configuration directory and fall back to
+calling the API themselves when no daemon is running.
+
+Start it with: python -m commitassist.daemon
+"""
+
+import json
+import os
+import socket
+import socketserver
+
+import click
+
+
+# Version of the JSON request/response format
+PROTOCOL_VERSION = 1
+
+
+def request_suggestions(diff, files, directory, temperature=0.7, count=1, detailed=True,
+                        use_cache=True, timeout=None):
+    """
+    Ask a running daemon to generate commit messages for a staged diff.
+    
+    Only a failed connection means there is no daemon to ask. Once the
+    request is sent the daemon may already be calling the API, so later
+    failures are reported as errors rather than letting the caller
+    generate (and pay for) the same messages again.
+    
+    Args:
+        diff (str): The staged git diff text
+        files (list): List of changed files
+        directory (str): Repository directory, used for the commit history context
+        temperature (float): Controls randomness in AI response
+        count (int): Number of suggestions to generate
+        detailed (bool): Generate messages with header and body
+        use_cache (bool): Let the daemon return cached messages
+        timeout (float): Seconds to wait for the daemon to answer, or None
+            to wait as long as its retries take
+    
+    Returns:
+        list: The suggestions (or a single error message), or None if no
+        daemon is available
+    """
+    if not hasattr(socket, 'AF_UNIX'):
+        return None
+    
+    request = {
+        "Version": PROTOCOL_VERSION,
+        "Action": "Suggest",
+        "Directory": directory,
+        "Diff": diff,
+        "Files": files,
+        "Temperature": temperature,
+        "Count": count,
+        "Detailed": detailed,
+        "UseCache": use_cache,
+    }
+    
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(get_socket_path())
+        except OSError:
+            # No socket file, or a stale one left by a daemon that exited
+            return None
+        
+        try:
+            sock.settimeout(timeout)
+            sock.sendall(json.dumps(request).encode('utf-8') + b'\n')
+            response = _read_line(sock)
+        except socket.timeout:
+            return [f"Error: The daemon did not answer within {timeout} seconds."]
+        except OSError as e:
+            return [f"Error: Lost the connection to the daemon: {str(e)}"]
+    
+    try:
+        data = json.loads(response)
+    except ValueError:
+        return ["Error: The daemon closed the connection without a valid answer."]
+    
+    if not isinstance(data, dict):
+        return ["Error: The daemon sent an invalid answer."]
+    
+    # A daemon speaking another protocol version rejects the request
+    # without generating anything, so it is safe to fall back
+    if data.get('Version') != PROTOCOL_VERSION:
+        return None
+    
+    if 'Error' in data:
+        return [f"Error from daemon: {data['Error']}"]
+    
+    suggestions = data.get('Suggestions')
+    if not isinstance(suggestions, list) or not suggestions:
+        return ["Error: The daemon sent an invalid answer."]
+    return suggestions
+
+
+def serve():
+    """
+    Run the daemon in the foreground until interrupted.
+    
+    Returns:
+        tuple: (success, message) describing why the daemon stopped
+    """
+    if not hasattr(socket, 'AF_UNIX'):
+        return False, "The daemon needs Unix domain sockets, which this platform does not support."
+    
+    socket_path = get_socket_path()
+    os.makedirs(os.path.dirname(socket_path), exist_ok=True)
+    
+    if os.path.exists(socket_path):
+        if _is_daemon_running(socket_path):
+            return False, f"A daemon is already listening on {socket_path}"
+        # Remove the socket left behind by a daemon that did not shut down cleanly
+        os.remove(socket_path)
+    
+    # Only the current user may connect: the daemon spends their API quota
+    old_umask = os.umask(0o177)
+    try:
+        server = socketserver.UnixStreamServer(socket_path, _SuggestionHandler)
+    finally:
+        os.umask(old_umask)
+    
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+    
+    return True, "Daemon stopped."
+
+
+def get_socket_path():
+    """
+    Get the path of the daemon's Unix socket.
+    
+    Returns:
+        str: Path to the socket file
+    """
+    home_dir = os.path.expanduser("~")
+    return os.path.join(home_dir, '.commit-assistant', 'daemon.sock')
+
+
+# Private helper functions
+
+class _SuggestionHandler(socketserver.StreamRequestHandler):
+    """
+    Handle one JSON request per connection.
+    
+    The server is single-threaded on purpose: each request changes the working
+    directory to the client's repository before gathering its history.
+    """
+    
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            # A bare connect, e.g. serve() checking for a running daemon
+            return
+        
+        try:
+            request = json.loads(line.decode('utf-8'))
+            response = _handle_request(request)
+        except ValueError:
+            response = {"Version": PROTOCOL_VERSION, "Error": "Malformed request"}
+        
+        self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+
+
+def _handle_request(request):
+    """
+    Run a decoded request and build the response.
+    
+    Args:
+        request (dict): The decoded JSON request
+    
+    Returns:
+        dict: The JSON-serializable response
+    """
+    if not isinstance(request, dict) or request.get('Version') != PROTOCOL_VERSION:
+        return {"Version": PROTOCOL_VERSION, "Error": "Unsupported protocol version"}
+    
+    if request.get('Action') != 'Suggest':
+        return {"Version": PROTOCOL_VERSION, "Error": f"Unknown action: {request.get('Action')}"}
+    
+    # Imported here so the client side of this module stays lightweight
+    from . import main
+    
+    try:
+        os.chdir(request['Directory'])
+    except (KeyError, TypeError, OSError):
+        return {"Version": PROTOCOL_VERSION, "Error": "Invalid repository directory"}
+    
+    if request.get('Detailed', True):
+        generate = main.generate_detailed_commit_message
+    else:
+        generate = main.generate_commit_message
+    
+    # get_openai_client() exits when the API key or the AI extras are
+    # missing; answer with the error instead of letting it stop the server
+    try:
+        suggestions = generate(request.get('Diff', ''), request.get('Files', []),
+                               temperature=request.get('Temperature', 0.7),
+                               use_cache=request.get('UseCache', True),
+                               n=request.get('Count', 1))
+    except SystemExit:
+        return {"Version": PROTOCOL_VERSION,
+                "Error": "The daemon could not create an OpenAI client; check its API key and installed packages"}
+    except Exception as e:
+        return {"Version": PROTOCOL_VERSION, "Error": f"Error generating suggestions: {str(e)}"}
+    
+    return {"Version": PROTOCOL_VERSION, "Suggestions": suggestions}
+
+
+def _read_line(sock):
+    """
+    Read one newline-terminated response from a socket.
+    
+    Args:
+        sock (socket.socket): Connected socket
+    
+    Returns:
+        bytes: The response without the trailing newline
+    """
+    chunks = []
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        if chunk.endswith(b'\n'):
+            break
+    return b''.join(chunks).rstrip(b'\n')
+
+
+def _is_daemon_running(socket_path):
+    """
+    Check whether a daemon is accepting connections on the socket.
+    
+    Args:
+        socket_path (str): Path to the socket file
+    
+    Returns:
+        bool: True if a connection could be made
+    """
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(socket_path)
+        return True
+    except OSError:
+        return False
+
+
+if __name__ == "__main__":
+    success, message = serve()
+    click.echo(message)
+    raise SystemExit(0 if success else 1)
@@ -7,7 +7,6 @@ global hooks that work across all repositories.
 """
 
 import os
-import platform
 import subprocess
 import git
 
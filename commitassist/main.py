@@ -1,27 +1,263 @@
 import os
 import sys
+import functools
+import itertools
 import git
-import platform
 import subprocess
+import tempfile
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from openai import OpenAI
-from dotenv import load_dotenv
 import click
 import time
 import random
 import re
-import string
 
-# Import hook functions from the hooks module
-from . import hooks
+from . import cache
 
-# Load environment variables from a .env file if present
-# This allows users to store their API keys securely
-load_dotenv()
+
+# Separator lines used by the CLI output
+_SEP40 = "=" * 40
+_SEP50 = "=" * 50
+_SEP60 = "=" * 60
+_SEP70 = "=" * 70
+
+# Instructions shown by 'setup' before asking for the API key
+_SETUP_BANNER = "\n".join([
+    "\n" + _SEP60,
+    "OpenAI API Key Setup",
+    _SEP60,
+    "Get your API key from: https://platform.openai.com/api-keys",
+    "",
+    "Your API key should:",
+    "  - Start with 'sk-'",
+    "  - Be a long string (can be 50-200+ characters)",
+    "  - You can copy-paste it here",
+    "",
+    "The input will be visible for easy copy-paste verification.",
+    _SEP60,
+])
+
+# Prefixes of the error/warning strings returned in place of suggestions
+_ERROR_PREFIXES = ("Error", "No ")
+
+# Saved configuration lives in the user's home directory
+_HOME = os.path.expanduser("~")
+_CONFIG_DIR = os.path.join(_HOME, '.commit-assistant')
+_ENV_PATH = os.path.join(_CONFIG_DIR, '.env')
+
+# Hooks run by 'git commit'. GitPython's index.commit() never runs
+# prepare-commit-msg, ignores core.hooksPath and loses files restaged by pre-commit
+_COMMIT_HOOKS = ('pre-commit', 'prepare-commit-msg', 'commit-msg', 'post-commit')
+
+# Fixed for the life of the process, unlike platform.system() which calls uname()
+_IS_WINDOWS = os.name == 'nt'
+
+# Shown when the optional packages behind the AI commands are not installed
+_AI_EXTRAS_HINT = "AI features are not installed. Install them with: pip install \"ai-commit-assistant[ai]\""
+
+
+def _resolve_env_path():
+    """
+    Find the configuration .env file to load the API key from.
+    
+    Returns:
+        str: Path to the user's config file, or the package .env file as a
+        fallback, or None if neither exists
+    """
+    # User's home directory config written by 'ai-commit-assistant setup'
+    if os.path.exists(_ENV_PATH):
+        return _ENV_PATH
+    
+    # .env file in the same directory as the script
+    script_env_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')
+    if os.path.exists(script_env_path):
+        return script_env_path
+    
+    return None
+
+
+def _read_env_text(path):
+    """
+    Read a .env file, trying the encodings editors commonly save it in.
+    
+    The file is read once; each encoding is tried on the bytes in memory.
+    
+    Args:
+        path (str): Path to the .env file
+    
+    Returns:
+        str: The file content with surrounding whitespace stripped, or None
+        if it could not be decoded
+    """
+    with open(path, 'rb') as f:
+        raw = f.read()
+    
+    # Try UTF-8 first, fallback to other encodings
+    for encoding in ('utf-8', 'utf-8-sig', 'ascii', 'cp1252'):
+        try:
+            return raw.decode(encoding).strip()
+        except UnicodeDecodeError:
+            continue
+    return None
+
+
+def _extract_api_key_line(content):
+    """
+    Find the OPENAI_API_KEY value in .env file content.
+    
+    Args:
+        content (str): Text of the .env file
+    
+    Returns:
+        str: The value after 'OPENAI_API_KEY=', or None if there is no such line
+    """
+    # Prefix a newline so a key on the first line is matched like any other
+    _, found, rest = ('\n' + content).partition('\nOPENAI_API_KEY=')
+    if not found:
+        return None
+    return rest.partition('\n')[0].strip()
+
+
+@functools.lru_cache(maxsize=None)
+def _load_env():
+    """
+    Load the configuration .env file once per process.
+    
+    Values already present in the environment (including a project .env
+    file) take precedence over the saved configuration.
+    
+    Returns:
+        str: Path of the loaded file, or None if no file was found
+    """
+    # Imported here so commands that never need the API key skip dotenv
+    from dotenv import load_dotenv
+    
+    # Load environment variables from a .env file if present
+    # This allows users to store their API keys securely
+    load_dotenv()
+    
+    env_path = _resolve_env_path()
+    if env_path:
+        load_dotenv(env_path, override=False)
+    return env_path
 
 # Initialize the OpenAI client with the API key from environment variables
 # client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
+# OpenAI model used for commit message generation (gpt-4 gives better results at higher cost)
+_MODEL = "gpt-3.5-turbo"
+
+# Map file extensions to the language/category reported to the AI
+_EXT_LANG = {
+    '.py': 'Python',
+    '.js': 'JavaScript',
+    '.ts': 'TypeScript',
+    '.jsx': 'React',
+    '.tsx': 'React',
+    '.html': 'Web',
+    '.css': 'Web',
+    '.json': 'Config',
+    '.yml': 'Config',
+    '.yaml': 'Config',
+    '.md': 'Documentation',
+    '.txt': 'Documentation',
+}
+
+# System message that instructs the AI how to generate short commit messages
+_SYSTEM_MSG_SHORT = """
+    You are a git commit message generator that follows best practices. Generate concise, meaningful commit messages that:
+    
+    1. Use the conventional commits format when appropriate (type: description)
+    2. Start with a verb in imperative mood (e.g., "Add", "Fix", "Update", "Refactor")
+    3. Are concise but descriptive (under 72 characters for the first line)
+    4. Focus on the "why" and "what" rather than the "how"
+    5. Match the project's existing commit style if examples are provided
+    6. NEVER include commit hashes, issue numbers, or any parenthetical references unless specifically mentioned in the changes
+    7. Write in present tense as if the commit is being applied now
+    
+    Respond ONLY with the suggested commit message text, nothing else. Do not include any metadata, hashes, or additional formatting.
+    """
+
+# System message for detailed commit messages
+_SYSTEM_MSG_DETAILED = """
+    You are a git commit message generator that creates detailed, professional commit messages. Generate a commit message with both header and body that follows this format:
+
+    HEADER: Brief description (under 72 characters)
+    
+    BODY: Detailed explanation including what was changed and why
+
+    Guidelines:
+    1. Header should use conventional commits format (type: description)
+    2. Header should start with a verb in imperative mood (Add, Fix, Update, Refactor, etc.)
+    3. Body should explain the changes in detail with bullet points if multiple changes
+    4. Body should explain WHY the changes were made, not just what
+    5. Keep lines under 72 characters wide
+    6. NEVER include commit hashes, issue numbers, or metadata
+    7. Use present tense as if the commit is being applied now
+    8. Separate header and body with a blank line
+
+    Example format:
+    feat: Add user authentication system
+    
+    Implement JWT-based authentication to secure API endpoints.
+    
+    - Add login/logout functionality with token generation
+    - Create middleware for request validation
+    - Implement secure password hashing
+    - Set up session management for user state
+    
+    This addresses security requirements and improves user experience
+    by providing seamless authentication flow.
+
+    Respond with the complete commit message in this format.
+    """
+
+# Character budget for the diff excerpt sent for large changesets
+_DIFF_BUDGET = 5000
+
+# Generated files that add tokens without helping the AI describe a change
+_SKIPPED_DIFF_FILES = frozenset({
+    'package-lock.json', 'yarn.lock', 'pnpm-lock.yaml', 'poetry.lock',
+    'Pipfile.lock', 'Cargo.lock', 'Gemfile.lock', 'composer.lock', 'go.sum',
+})
+_SKIPPED_DIFF_SUFFIXES = (
+    '.min.js', '.min.css', '.map', '.png', '.jpg', '.jpeg', '.gif', '.ico',
+    '.pdf', '.zip', '.gz', '.woff', '.woff2', '.ttf',
+)
+
+# Markers that identify machine-generated source files
+_GENERATED_MARKERS = ('@generated', 'DO NOT EDIT')
+
+# str.translate table that deletes control characters (except tab, newline
+# and carriage return) and the zero-width characters picked up by copy-paste
+_SANITIZE_TRANSLATE = {i: None for i in range(32) if i not in (9, 10, 13)}
+_SANITIZE_TRANSLATE.update({
+    0x7f: None,    # Delete
+    0x200b: None,  # Zero width space
+    0x200c: None,  # Zero width non-joiner
+    0x200d: None,  # Zero width joiner
+    0xfeff: None,  # Byte order mark
+    0x2060: None,  # Word joiner
+})
+
+# Valid OpenAI API key shape: 'sk-' followed by letters, digits, '-' or '_'
+_SK_KEY_RE = re.compile(r'\Ask-[A-Za-z0-9_\-]+\Z')
+
+# Placeholder values left in templates instead of a real API key
+_PLACEHOLDERS = frozenset({
+    'key', 'your_api_key', 'your_api_key_here', 'your_actual_api_key_here',
+    'sk-example', 'sk-placeholder', 'sk-your_key_here', 'insert_key_here',
+})
+_SIMPLE_PLACEHOLDERS = _PLACEHOLDERS | {'paste_your_key_here', 'replace_with_your_key'}
+
+# API key validation results; tuples so the validators can be memoized
+_KeyValidation = namedtuple('_KeyValidation', 'valid error')
+_SimpleKeyValidation = namedtuple('_SimpleKeyValidation', 'valid warning')
+
+# Characters accepted by the lenient API key check
+_ALLOWED_KEY_CHARS = frozenset('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-_./+=')
+
 def get_openai_client():
     """
     Get OpenAI client with lazy initialization and API key validation.
@@ -30,12 +266,13 @@ def get_openai_client():
         OpenAI: Configured OpenAI client
         
     Raises:
-        SystemExit: If API key is not found
+        SystemExit: If the AI extras or the API key are not found
     """
-    # Try to load environment variables again in case they were set after import
-    home_env_path = os.path.join(os.path.expanduser("~"), '.commit-assistant', '.env')
-    if os.path.exists(home_env_path):
-        load_dotenv(home_env_path, override=True)
+    if not _has_ai_extras():
+        click.echo(_AI_EXTRAS_HINT, err=True)
+        sys.exit(1)
+    
+    _load_env()
     
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key or not api_key.strip():
@@ -45,79 +282,120 @@ def get_openai_client():
         click.echo("Get your API key from: https://platform.openai.com/api-keys", err=True)
         sys.exit(1)
     
-    return OpenAI(api_key=api_key.strip())
+    return _make_openai_client(api_key.strip())
+
+
+@functools.lru_cache(maxsize=None)
+def _has_ai_extras():
+    """
+    Check whether the optional openai and python-dotenv packages are installed.
+    
+    Returns:
+        bool: True if both packages can be imported
+    """
+    # find_spec locates the packages without importing them
+    from importlib.util import find_spec
+    return find_spec('openai') is not None and find_spec('dotenv') is not None
+
+
+@functools.lru_cache(maxsize=1)
+def _make_openai_client(api_key):
+    """
+    Create the OpenAI client once per API key.
+    
+    Reusing the client keeps its HTTP connection pool, so retries and
+    regenerated suggestions skip the TCP and TLS handshakes.
+    
+    Args:
+        api_key (str): The OpenAI API key
+    
+    Returns:
+        OpenAI: Configured OpenAI client
+    """
+    from openai import OpenAI
+    
+    return OpenAI(api_key=api_key)
 
 
 def get_git_diff():
     """
     Get the current git diff for staged files.
     
+    Commands read it once and pass it down, so regenerating suggestions
+    doesn't re-run git diff.
+    
     Returns:
         tuple: (diff_text, list_of_files) if successful, or (None, error_message) if failed
     """
     try:
-        # Open the current directory as a Git repository
-        repo = git.Repo(".")
+        # List staged files with their status (NUL-separated so any path is safe)
+        status = _run_git('diff', '--cached', '--name-status', '-z')
+        if status.returncode != 0:
+            return None, _git_error_message(status.stderr)
         
-        # Check if there are any staged changes (files added to index)
-        staged_files = repo.index.diff("HEAD")
+        # Entries are "<status>\0<path>\0", renames and copies carry two paths
+        fields = status.stdout.split('\0')
+        changed_files = []
+        i = 0
+        while i < len(fields) - 1:
+            code = fields[i]
+            if code[:1] in ('R', 'C'):
+                # Report the destination path of a rename/copy
+                changed_files.append(fields[i + 2])
+                i += 3
+            else:
+                changed_files.append(fields[i + 1])
+                i += 2
         
-        if not staged_files:
+        if not changed_files:
             # No changes are staged, return an error message
             return None, "No staged changes found. Use 'git add <files>' to stage changes."
         
         # Get diff for staged changes (--cached shows only staged changes)
-        diff = repo.git.diff("--cached")
+        result = _run_git('diff', '--cached')
+        if result.returncode != 0:
+            return None, _git_error_message(result.stderr)
+        diff = result.stdout
         
-        # If diff is empty but we have staged files, there might be new files
+        # Empty files or mode-only changes may produce no patch text
         if not diff.strip():
-            # Try to get diff including new files
-            diff = repo.git.diff("--cached", "--no-prefix")
-        
-        # Get the list of changed file paths
-        changed_files = []
-        
-        # Get staged files (modified existing files)
-        for item in staged_files:
-            changed_files.append(item.a_path or item.b_path)
-            # DEBUG: Print what files we detected
-            # print(f"DEBUG: Staged files detected: {changed_files}")
-            # print(f"DEBUG: Diff length: {len(diff)} characters")
-            # print(f"DEBUG: First 200 chars of diff: {diff[:200]}")
-            
-        # Also check for new files that are staged
-        try:
-            # Get files that are staged but not in HEAD (new files)
-            new_files = repo.git.diff("--cached", "--name-only", "--diff-filter=A").splitlines()
-            for new_file in new_files:
-                if new_file not in changed_files:
-                    changed_files.append(new_file)
-        except:
-            pass
-                
-        # If we still don't have a diff, try a different approach
-        if not diff.strip() and changed_files:
-            # For new files, git diff --cached might be empty
-            # Let's try to get the content of new files
-            try:
-                diff = repo.git.diff("--cached", "--", *changed_files)
-            except:
-                # Fallback: just indicate that files were added
-                diff = f"New files added: {', '.join(changed_files)}"
+            diff = f"New files added: {', '.join(changed_files)}"
         
         return diff, changed_files
         
-    except git.exc.InvalidGitRepositoryError:
-        # Not a git repository
-        return None, "Current directory is not a Git repository."
-    except git.exc.GitCommandError as e:
-        # Git command failed
-        return None, f"Git error: {str(e)}"
     except Exception as e:
-        # Catch any other errors
+        # Catch any other errors (e.g. git executable not found)
         return None, f"Error: {str(e)}"
 
 
+def _run_git(*args):
+    """
+    Run a git command in the current directory and capture its output.
+    
+    Returns:
+        subprocess.CompletedProcess: The finished git process
+    """
+    return subprocess.run(['git', *args], capture_output=True, text=True,
+                          encoding='utf-8', errors='replace')
+
+
+def _git_error_message(stderr):
+    """
+    Turn git's stderr output into a user-facing error message.
+    
+    Args:
+        stderr (str): Error output from a failed git command
+        
+    Returns:
+        str: Error message
+    """
+    # Outside a repository, git diff falls back to --no-index and prints usage
+    lowered = stderr.lower()
+    if 'not a git repository' in lowered or '--no-index' in lowered:
+        return "Current directory is not a Git repository."
+    return f"Git error: {stderr.strip()}"
+
+
 def detect_file_types(files):
     """
     Analyze the file types to provide language-specific context.
@@ -129,35 +407,143 @@ def detect_file_types(files):
         tuple: (list of languages, dict of extensions counts)
     """
     extensions = {}
+    languages = []
+    seen = set()
     
-    # Count file extensions
+    # Count file extensions and map them to languages in a single pass
     for file in files:
         # Get the file extension (lowercase for consistency)
         ext = os.path.splitext(file)[1].lower()
-        if ext:
-            # Count occurrences of each extension
-            extensions[ext] = extensions.get(ext, 0) + 1
-    
-    # Map extensions to common programming languages
-    languages = []
-    if '.py' in extensions:
-        languages.append('Python')
-    if '.js' in extensions:
-        languages.append('JavaScript')
-    if '.ts' in extensions:
-        languages.append('TypeScript')
-    if '.jsx' in extensions or '.tsx' in extensions:
-        languages.append('React')
-    if '.html' in extensions or '.css' in extensions:
-        languages.append('Web')
-    if '.json' in extensions or '.yml' in extensions or '.yaml' in extensions:
-        languages.append('Config')
-    if '.md' in extensions or '.txt' in extensions:
-        languages.append('Documentation')
+        if not ext:
+            continue
+        
+        # Count occurrences of each extension
+        extensions[ext] = extensions.get(ext, 0) + 1
+        
+        # Record each language once, in the order it was first seen
+        language = _EXT_LANG.get(ext)
+        if language and language not in seen:
+            seen.add(language)
+            languages.append(language)
     
     return languages, extensions
 
 
+def _split_diff_by_file(diff):
+    """
+    Split a git diff into one section per file.
+    
+    Args:
+        diff (str): The git diff text
+    
+    Returns:
+        list: Diff sections, each starting with its 'diff --git' header
+    """
+    return [section for section in re.split(r'(?m)^(?=diff --git )', diff) if section]
+
+
+def _is_skipped_diff_section(section):
+    """
+    Check whether a diff section belongs to a binary, lock or generated file.
+    
+    Args:
+        section (str): Diff text for a single file
+    
+    Returns:
+        bool: True if the section should be left out of the prompt
+    """
+    header = section.split('\n', 1)[0]
+    path = header.rpartition(' b/')[2]
+    
+    if os.path.basename(path) in _SKIPPED_DIFF_FILES:
+        return True
+    if path.lower().endswith(_SKIPPED_DIFF_SUFFIXES):
+        return True
+    if '\nBinary files ' in section:
+        return True
+    
+    # Large changes to files that declare themselves generated
+    changed_lines = sum(1 for line in section.splitlines()
+                        if line[:1] in ('+', '-') and line[:3] not in ('+++', '---'))
+    if changed_lines > 50 and any(marker in section for marker in _GENERATED_MARKERS):
+        return True
+    
+    return False
+
+
+def _pack_diff_sections(diff, budget=_DIFF_BUDGET):
+    """
+    Fit a large diff into a character budget along file boundaries.
+    
+    Binary, lock and generated files are dropped, and the remaining budget is
+    shared between the other files so each one contributes the start of its
+    diff, cut at a line boundary.
+    
+    Args:
+        diff (str): The git diff text
+        budget (int): Maximum number of diff characters to keep
+    
+    Returns:
+        tuple: (packed diff text, tuple of skipped file paths)
+    """
+    sections = []
+    skipped = []
+    for section in _split_diff_by_file(diff):
+        if _is_skipped_diff_section(section):
+            skipped.append(section.split('\n', 1)[0].rpartition(' b/')[2])
+        else:
+            sections.append(section)
+    
+    # Share the budget fairly: small sections keep everything, and whatever
+    # they leave over goes to the larger ones
+    allowance = {}
+    remaining = budget
+    by_size = sorted(range(len(sections)), key=lambda i: len(sections[i]))
+    for position, index in enumerate(by_size):
+        share = remaining // (len(sections) - position)
+        allowance[index] = min(len(sections[index]), share)
+        remaining -= allowance[index]
+    
+    packed = []
+    for index, section in enumerate(sections):
+        limit = allowance[index]
+        if len(section) <= limit:
+            packed.append(section)
+        else:
+            # Cut at the last complete line that fits
+            cut = section.rfind('\n', 0, limit)
+            packed.append(section[:cut if cut > 0 else limit] + '\n... (truncated)\n')
+    
+    return ''.join(packed), tuple(skipped)
+
+
+def build_diff_summary(diff, files):
+    """
+    Prepare the diff text for the prompt.
+    
+    Small diffs are sent as they are. For large diffs, show a summary of
+    changes rather than the raw diff: the file list plus per-file excerpts
+    that fit the character budget.
+    
+    Args:
+        diff (str): The git diff text
+        files (list): List of changed files
+    
+    Returns:
+        str: Diff text to include in the prompt
+    """
+    if len(diff) <= _DIFF_BUDGET:
+        return diff
+    
+    summary_parts = [f"Large changeset with {len(files)} files:\n"]
+    summary_parts.extend(f"- {file}\n" for file in files)
+    packed_diff, skipped_files = _pack_diff_sections(diff)
+    if skipped_files:
+        summary_parts.append(f"\nSkipped binary/generated files: {', '.join(skipped_files)}\n")
+    summary_parts.append(f"\nDiff excerpts:\n{packed_diff}")
+    return ''.join(summary_parts)
+
+
 def get_repo_context(files, max_commits=5):
     """
     Get contextual information about the repository to improve AI suggestions.
@@ -170,7 +556,7 @@ def get_repo_context(files, max_commits=5):
         dict: Repository context information
     """
     try:
-        repo = git.Repo(".")
+        repo = git.Repo(".", search_parent_directories=True)
         
         # Try to get repository name from remote URL
         try:
@@ -186,22 +572,29 @@ def get_repo_context(files, max_commits=5):
         # Get recent commits for the changed files
         recent_commits = []
         
-        # For each file, get recent commits
-        for file_path in files:
+        def file_history(file_path):
             try:
                 # Get up to 'max_commits' recent commits for this file
-                file_commits = list(repo.iter_commits(paths=file_path, max_count=max_commits))
-                
-                for commit in file_commits:
-                    # Add commit information to our list
-                    recent_commits.append({
-                        'file': file_path,
-                        'message': commit.message.strip(),
-                        'hash': commit.hexsha[:7]  # Short hash
-                    })
+                return list(repo.iter_commits(paths=file_path, max_count=max_commits))
             except:
                 # Skip if we can't get commits for this file
-                continue
+                return []
+        
+        # Each lookup runs its own 'git rev-list', so run them side by side
+        if files:
+            with ThreadPoolExecutor(max_workers=min(8, len(files))) as pool:
+                histories = list(pool.map(file_history, files))
+        else:
+            histories = []
+        
+        for file_path, file_commits in zip(files, histories):
+            for commit in file_commits:
+                # Add commit information to our list
+                recent_commits.append({
+                    'file': file_path,
+                    'message': commit.message.strip(),
+                    'hash': commit.hexsha[:7]  # Short hash
+                })
         
         # Get repository branches
         try:
@@ -224,179 +617,252 @@ def get_repo_context(files, max_commits=5):
         }
 
 
-def generate_commit_message(diff, files, temperature=0.7, max_retries=3):
+def _retry_delay(attempt, error=None):
     """
-    Generate a commit message using OpenAI's API with retry logic.
+    Work out how long to wait before retrying a failed API request.
+    
+    Uses exponential backoff with full jitter, capped at 30 seconds, unless
+    the server asked for a specific delay with a Retry-After header.
     
     Args:
-        diff (str): The git diff text
-        files (list): List of changed files
+        attempt (int): Zero-based number of the attempt that failed
+        error (Exception): The error raised by the failed request, if any
+    
+    Returns:
+        float: Number of seconds to wait
+    """
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if headers is not None:
+        try:
+            retry_after = float(headers.get('retry-after', ''))
+            if 0 <= retry_after <= 60:
+                return retry_after
+        except (TypeError, ValueError):
+            pass
+    
+    return random.uniform(0, min(30, 2 ** (attempt + 1)))
+
+
+def _call_with_retry(system_message, user_prompt, max_tokens, temperature=0.7, n=1,
+                     max_retries=3, stream=False, label="commit message"):
+    """
+    Send a chat completion request, retrying transient failures.
+    
+    Args:
+        system_message (str): The system prompt
+        user_prompt (str): The user prompt with the diff and context
+        max_tokens (int): Maximum length of each response
         temperature (float): Controls randomness in AI response (0.0-1.0)
+        n (int): Number of messages to sample
         max_retries (int): Maximum number of retry attempts
-        
+        stream (bool): Stream the response and stop reading once every
+            message has a complete first line
+        label (str): What is being generated, for error messages
+    
     Returns:
-        str: Generated commit message or error message
+        tuple: (list of message texts, None) if successful, or (None, error_message) if failed
     """
-    if not diff:
-        return "No changes to analyze."
+    for attempt in range(max_retries):
+        try:
+            response = _create_chat_completion(system_message, user_prompt, max_tokens,
+                                               temperature=temperature, n=n, stream=stream)
+            
+            if not stream:
+                return [choice.message.content or '' for choice in response.choices], None
+            
+            # Collect streamed tokens per choice until every first line is complete
+            buffers = [[] for _ in range(n)]
+            finished = set()
+            for chunk in response:
+                for choice in chunk.choices:
+                    if choice.index in finished:
+                        continue
+                    buffers[choice.index].append(choice.delta.content or '')
+                    if '\n' in ''.join(buffers[choice.index]).strip():
+                        finished.add(choice.index)
+                if len(finished) == n:
+                    break
+            response.close()
+            
+            return [''.join(buf) for buf in buffers], None
+        
+        except Exception as e:
+            error = _api_error_message(e, attempt, max_retries, label)
+            if error:
+                return None, error
     
-    # Get file types to provide context about programming languages
-    languages, extensions = detect_file_types(files)
+    return None, "Error: All retry attempts failed."
+
+
+def _stream_with_retry(system_message, user_prompt, max_tokens, temperature=0.7,
+                       max_retries=3, label="commit message"):
+    """
+    Stream a single chat completion, retrying failures that happen before
+    any text has arrived.
     
-    # Get repository context for better suggestions
-    repo_context = get_repo_context(files)
+    Args:
+        system_message (str): The system prompt
+        user_prompt (str): The user prompt with the diff and context
+        max_tokens (int): Maximum length of the response
+        temperature (float): Controls randomness in AI response (0.0-1.0)
+        max_retries (int): Maximum number of retry attempts
+        label (str): What is being generated, for error messages
     
-    # Format context information for the prompt
-    context = f"""
-    Repository: {repo_context['name']}
-    Branch: {repo_context['branch']}
+    Yields:
+        str: Pieces of the message text as they arrive
     
-    Languages detected: {', '.join(languages) if languages else 'None specifically identified'}
+    Returns:
+        tuple: (message text, None) if successful, or (text received so far, error_message) if failed
     """
+    pieces = []
+    for attempt in range(max_retries):
+        try:
+            response = _create_chat_completion(system_message, user_prompt, max_tokens,
+                                               temperature=temperature, stream=True)
+            for chunk in response:
+                for choice in chunk.choices:
+                    if choice.delta.content:
+                        pieces.append(choice.delta.content)
+                        yield choice.delta.content
+            
+            return ''.join(pieces), None
+        
+        except Exception as e:
+            # Text already shown can't be taken back, so only retry before the first piece
+            error = _api_error_message(e, attempt, max_retries, label, can_retry=not pieces)
+            if error:
+                return ''.join(pieces), error
     
-    # Add recent commit history if available (but clean it up)
-    if repo_context['recent_commits']:
-        context += "\nRecent commit message patterns:\n"
-        # List up to 3 recent commits for style reference, but remove hashes
-        for i, commit in enumerate(repo_context['recent_commits'][:3]):
-            # Clean the commit message - remove any hash patterns
-            clean_message = commit['message'].split('(')[0].strip()  # Remove anything in parentheses
-            context += f"- {clean_message}\n"
-    
-    # Prepare a system message that instructs the AI how to generate commit messages
-    system_message = """
-    You are a git commit message generator that follows best practices. Generate concise, meaningful commit messages that:
+    return ''.join(pieces), "Error: All retry attempts failed."
+
+
+def _create_chat_completion(system_message, user_prompt, max_tokens, temperature=0.7, n=1,
+                            stream=False):
+    """
+    Send one chat completion request.
     
-    1. Use the conventional commits format when appropriate (type: description)
-    2. Start with a verb in imperative mood (e.g., "Add", "Fix", "Update", "Refactor")
-    3. Are concise but descriptive (under 72 characters for the first line)
-    4. Focus on the "why" and "what" rather than the "how"
-    5. Match the project's existing commit style if examples are provided
-    6. NEVER include commit hashes, issue numbers, or any parenthetical references unless specifically mentioned in the changes
-    7. Write in present tense as if the commit is being applied now
+    Args:
+        system_message (str): The system prompt
+        user_prompt (str): The user prompt with the diff and context
+        max_tokens (int): Maximum length of each response
+        temperature (float): Controls randomness in AI response (0.0-1.0)
+        n (int): Number of messages to sample
+        stream (bool): Return an iterator of chunks instead of the full response
     
-    Respond ONLY with the suggested commit message text, nothing else. Do not include any metadata, hashes, or additional formatting.
+    Returns:
+        The OpenAI response, or a stream of chunks
     """
+    # Get client with lazy initialization
+    client = get_openai_client()
     
-    # Create the user prompt with the diff and context
-    # Smart diff handling for large changes
-    if len(diff) > 5000:
-        # For large diffs, show a summary of changes rather than raw diff
-        diff_summary = f"Large changeset with {len(files)} files:\n"
-        for file in files:
-            diff_summary += f"- {file}\n"
-        diff_summary += f"\nFirst 2000 chars of diff:\n{diff[:2000]}"
-        diff_summary += f"\n\nLast 1000 chars of diff:\n{diff[-1000:]}"
-    else:
-        diff_summary = diff
-
-    user_prompt = f"""
-    Please suggest a commit message for the following changes:
+    return client.chat.completions.create(
+        model=_MODEL,
+        messages=[
+            {"role": "system", "content": system_message},
+            {"role": "user", "content": user_prompt}
+        ],
+        temperature=temperature,  # Controls randomness (0.0 = deterministic, 1.0 = creative)
+        max_tokens=max_tokens,  # Limit response length
+        n=n,  # Sample all suggestions in one request
+        top_p=1,
+        frequency_penalty=0,
+        presence_penalty=0,
+        stream=stream
+    )
 
-    {context}
 
-    Files changed: {', '.join(files)}
+def _api_error_message(error, attempt, max_retries, label, can_retry=True):
+    """
+    Decide what to do about a failed API request.
+    
+    Transient failures are waited out (with a note to the user) while retries
+    remain; everything else becomes an error message.
+    
+    Args:
+        error (Exception): The error raised by the request
+        attempt (int): Zero-based number of the attempt that failed
+        max_retries (int): Maximum number of retry attempts
+        label (str): What is being generated, for error messages
+        can_retry (bool): False if the request must not be repeated
+    
+    Returns:
+        str: Error message to give up with, or None to try again
+    """
+    # The OpenAI SDK is slow to import, so only commands that call it load it
+    import openai
+    
+    retries_left = can_retry and attempt < max_retries - 1
+    
+    if isinstance(error, openai.AuthenticationError):
+        return "Error: Invalid API key. Please check your OpenAI API key and run 'ai-commit-assistant setup' if needed."
+    
+    if isinstance(error, openai.RateLimitError):
+        # Exhausted credit is reported as a rate limit but won't recover
+        if getattr(error, 'code', None) == 'insufficient_quota':
+            return "Error: OpenAI API quota exceeded. Please check your billing and usage limits."
+        if not retries_left:
+            return "Error: Rate limit exceeded. Please try again in a few minutes."
+        wait_time = _retry_delay(attempt, error)
+        click.echo(f"Rate limit hit. Waiting {wait_time:.1f} seconds before retry {attempt + 2}/{max_retries}...")
+        time.sleep(wait_time)
+        return None
+    
+    if isinstance(error, openai.InternalServerError):
+        if not retries_left:
+            return "Error: OpenAI service is currently experiencing issues. Please try again later."
+        wait_time = _retry_delay(attempt, error)
+        click.echo(f"Server error (attempt {attempt + 1}/{max_retries}). Retrying in {wait_time:.1f} seconds...")
+        time.sleep(wait_time)
+        return None
+    
+    if isinstance(error, openai.APIConnectionError):
+        if not retries_left:
+            return "Error: Network connection issues. Please check your internet connection."
+        wait_time = _retry_delay(attempt)
+        click.echo(f"Network error (attempt {attempt + 1}/{max_retries}). Retrying in {wait_time:.1f} seconds...")
+        time.sleep(wait_time)
+        return None
+    
+    if isinstance(error, openai.BadRequestError):
+        # The request itself is invalid, so retrying won't help
+        return f"Error generating {label}: {str(error)}"
+    
+    # For unknown errors, try once more if we have retries left
+    if not retries_left:
+        return f"Error generating {label}: {str(error)}"
+    click.echo(f"Unexpected error (attempt {attempt + 1}/{max_retries}). Retrying...")
+    time.sleep(1)
+    return None
 
-    Diff summary:
-    {diff_summary}
 
-    Generate a clean commit message without any commit hashes, issue numbers, or metadata.
+def _clean_commit_message(message):
     """
+    Remove commit hashes and similar references the AI sometimes adds.
     
-    # Retry loop for API calls
-    for attempt in range(max_retries):
-        try:
-            # Get client with lazy initialization
-            client = get_openai_client()
-            
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",  # Can be changed to gpt-4 for better results
-                messages=[
-                    {"role": "system", "content": system_message},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=temperature,  # Controls randomness (0.0 = deterministic, 1.0 = creative)
-                max_tokens=100,  # Limit response length
-                top_p=1,
-                frequency_penalty=0,
-                presence_penalty=0
-            )
-            
-            # Extract the message from the response
-            commit_message = response.choices[0].message.content.strip()
-            
-            # Clean up the message - remove any remaining hashes or unwanted patterns
-            # Remove patterns like (abc1234) or [abc1234] or #abc1234
-            import re
-            commit_message = re.sub(r'\s*[\(\[]?[a-f0-9]{6,8}[\)\]]?\s*$', '', commit_message)
-            commit_message = re.sub(r'\s*#[a-f0-9]{6,8}\s*', '', commit_message)
-            
-            return commit_message.strip()
-            
-        except Exception as e:
-            error_str = str(e).lower()
-            
-            # Check for specific error types
-            if "rate limit" in error_str or "too many requests" in error_str:
-                if attempt < max_retries - 1:
-                    wait_time = (2 ** attempt) + random.uniform(0, 1)  # Exponential backoff with jitter
-                    click.echo(f"Rate limit hit. Waiting {wait_time:.1f} seconds before retry {attempt + 2}/{max_retries}...")
-                    time.sleep(wait_time)
-                    continue
-                else:
-                    return "Error: Rate limit exceeded. Please try again in a few minutes."
-            
-            elif "500 internal server error" in error_str or "502 bad gateway" in error_str or "503 service unavailable" in error_str:
-                if attempt < max_retries - 1:
-                    wait_time = (2 ** attempt) + random.uniform(0, 1)
-                    click.echo(f"Server error (attempt {attempt + 1}/{max_retries}). Retrying in {wait_time:.1f} seconds...")
-                    time.sleep(wait_time)
-                    continue
-                else:
-                    return "Error: OpenAI service is currently experiencing issues. Please try again later."
-            
-            elif "authentication" in error_str or "api key" in error_str or "unauthorized" in error_str:
-                return "Error: Invalid API key. Please check your OpenAI API key and run 'ai-commit-assistant setup' if needed."
-            
-            elif "quota" in error_str or "billing" in error_str:
-                return "Error: OpenAI API quota exceeded. Please check your billing and usage limits."
-            
-            elif "network" in error_str or "connection" in error_str or "timeout" in error_str:
-                if attempt < max_retries - 1:
-                    wait_time = 2 + random.uniform(0, 1)
-                    click.echo(f"Network error (attempt {attempt + 1}/{max_retries}). Retrying in {wait_time:.1f} seconds...")
-                    time.sleep(wait_time)
-                    continue
-                else:
-                    return "Error: Network connection issues. Please check your internet connection."
-            
-            else:
-                # For unknown errors, try once more if we have retries left
-                if attempt < max_retries - 1:
-                    click.echo(f"Unexpected error (attempt {attempt + 1}/{max_retries}). Retrying...")
-                    time.sleep(1)
-                    continue
-                else:
-                    return f"Error generating commit message: {str(e)}"
+    Args:
+        message (str): Raw message from the API
     
-    return "Error: All retry attempts failed."
+    Returns:
+        str: Cleaned commit message
+    """
+    # Remove patterns like (abc1234) or [abc1234] or #abc1234
+    message = re.sub(r'\s*[\(\[]?[a-f0-9]{6,8}[\)\]]?\s*$', '', message.strip())
+    message = re.sub(r'\s*#[a-f0-9]{6,8}\s*', '', message)
+    return message.strip()
+
 
-def generate_detailed_commit_message(diff, files, temperature=0.7, max_retries=3):
+def _build_user_prompt(diff, files):
     """
-    Generate a detailed commit message with header and body using OpenAI's API with retry logic.
+    Build the user prompt with the diff and repository context.
     
     Args:
         diff (str): The git diff text
         files (list): List of changed files
-        temperature (float): Controls randomness in AI response (0.0-1.0)
-        max_retries (int): Maximum number of retry attempts
-        
+    
     Returns:
-        str: Generated detailed commit message with header and body
+        str: The prompt to send along with the system message
     """
-    if not diff:
-        return "No changes to analyze."
-    
     # Get file types to provide context about programming languages
     languages, extensions = detect_file_types(files)
     
@@ -404,67 +870,24 @@ def generate_detailed_commit_message(diff, files, temperature=0.7, max_retries=3
     repo_context = get_repo_context(files)
     
     # Format context information for the prompt
-    context = f"""
+    context_parts = [f"""
     Repository: {repo_context['name']}
-    Branch: {repo_context['branch']}
-    
-    Languages detected: {', '.join(languages) if languages else 'None specifically identified'}
-    """
-    
-    # Add recent commit history if available (but clean it up)
-    if repo_context['recent_commits']:
-        context += "\nRecent commit message patterns:\n"
-        # List up to 3 recent commits for style reference, but remove hashes
-        for i, commit in enumerate(repo_context['recent_commits'][:3]):
-            # Clean the commit message - remove any hash patterns
-            clean_message = commit['message'].split('(')[0].strip()
-            context += f"- {clean_message}\n"
-    
-    # Prepare a system message for detailed commit messages
-    system_message = """
-    You are a git commit message generator that creates detailed, professional commit messages. Generate a commit message with both header and body that follows this format:
-
-    HEADER: Brief description (under 72 characters)
-    
-    BODY: Detailed explanation including what was changed and why
-
-    Guidelines:
-    1. Header should use conventional commits format (type: description)
-    2. Header should start with a verb in imperative mood (Add, Fix, Update, Refactor, etc.)
-    3. Body should explain the changes in detail with bullet points if multiple changes
-    4. Body should explain WHY the changes were made, not just what
-    5. Keep lines under 72 characters wide
-    6. NEVER include commit hashes, issue numbers, or metadata
-    7. Use present tense as if the commit is being applied now
-    8. Separate header and body with a blank line
-
-    Example format:
-    feat: Add user authentication system
-    
-    Implement JWT-based authentication to secure API endpoints.
+    Branch: {repo_context['branch']}
     
-    - Add login/logout functionality with token generation
-    - Create middleware for request validation
-    - Implement secure password hashing
-    - Set up session management for user state
+    Languages detected: {', '.join(languages) if languages else 'None specifically identified'}
+    """]
     
-    This addresses security requirements and improves user experience
-    by providing seamless authentication flow.
-
-    Respond with the complete commit message in this format.
-    """
+    # Add recent commit history if available (but clean it up)
+    if repo_context['recent_commits']:
+        context_parts.append("\nRecent commit message patterns:\n")
+        # List up to 3 recent commits for style reference, but remove hashes
+        # (anything from the first parenthesis on is dropped)
+        context_parts.extend(f"- {commit['message'].split('(', 1)[0].strip()}\n"
+                             for commit in repo_context['recent_commits'][:3])
+    context = ''.join(context_parts)
     
     # Create the user prompt with the diff and context
-    # Smart diff handling for large changes
-    if len(diff) > 5000:
-        # For large diffs, show a summary of changes rather than raw diff
-        diff_summary = f"Large changeset with {len(files)} files:\n"
-        for file in files:
-            diff_summary += f"- {file}\n"
-        diff_summary += f"\nFirst 2000 chars of diff:\n{diff[:2000]}"
-        diff_summary += f"\n\nLast 1000 chars of diff:\n{diff[-1000:]}"
-    else:
-        diff_summary = diff
+    diff_summary = build_diff_summary(diff, files)
 
     user_prompt = f"""
     Please suggest a commit message for the following changes:
@@ -479,97 +902,121 @@ def generate_detailed_commit_message(diff, files, temperature=0.7, max_retries=3
     Generate a clean commit message without any commit hashes, issue numbers, or metadata.
     """
     
-    # Retry loop for API calls
-    for attempt in range(max_retries):
-        try:
-            # Get client with lazy initialization
-            client = get_openai_client()
-            
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": system_message},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=temperature,
-                max_tokens=300,  # Increased for detailed messages
-                top_p=1,
-                frequency_penalty=0,
-                presence_penalty=0
-            )
-            
-            # Extract the message from the response
-            commit_message = response.choices[0].message.content.strip()
-            
-            # Clean up the message - remove any remaining hashes or unwanted patterns
-            import re
-            commit_message = re.sub(r'\s*[\(\[]?[a-f0-9]{6,8}[\)\]]?\s*$', '', commit_message)
-            commit_message = re.sub(r'\s*#[a-f0-9]{6,8}\s*', '', commit_message)
-            
-            return commit_message.strip()
-            
-        except Exception as e:
-            error_str = str(e).lower()
-            
-            # Check for specific error types (same logic as above)
-            if "rate limit" in error_str or "too many requests" in error_str:
-                if attempt < max_retries - 1:
-                    wait_time = (2 ** attempt) + random.uniform(0, 1)
-                    click.echo(f"Rate limit hit. Waiting {wait_time:.1f} seconds before retry {attempt + 2}/{max_retries}...")
-                    time.sleep(wait_time)
-                    continue
-                else:
-                    return "Error: Rate limit exceeded. Please try again in a few minutes."
-            
-            elif "500 internal server error" in error_str or "502 bad gateway" in error_str or "503 service unavailable" in error_str:
-                if attempt < max_retries - 1:
-                    wait_time = (2 ** attempt) + random.uniform(0, 1)
-                    click.echo(f"Server error (attempt {attempt + 1}/{max_retries}). Retrying in {wait_time:.1f} seconds...")
-                    time.sleep(wait_time)
-                    continue
-                else:
-                    return "Error: OpenAI service is currently experiencing issues. Please try again later."
-            
-            elif "authentication" in error_str or "api key" in error_str or "unauthorized" in error_str:
-                return "Error: Invalid API key. Please check your OpenAI API key and run 'ai-commit-assistant setup' if needed."
-            
-            elif "quota" in error_str or "billing" in error_str:
-                return "Error: OpenAI API quota exceeded. Please check your billing and usage limits."
-            
-            elif "network" in error_str or "connection" in error_str or "timeout" in error_str:
-                if attempt < max_retries - 1:
-                    wait_time = 2 + random.uniform(0, 1)
-                    click.echo(f"Network error (attempt {attempt + 1}/{max_retries}). Retrying in {wait_time:.1f} seconds...")
-                    time.sleep(wait_time)
-                    continue
-                else:
-                    return "Error: Network connection issues. Please check your internet connection."
-            
-            else:
-                if attempt < max_retries - 1:
-                    click.echo(f"Unexpected error (attempt {attempt + 1}/{max_retries}). Retrying...")
-                    time.sleep(1)
-                    continue
-                else:
-                    return f"Error generating detailed commit message: {str(e)}"
+    return user_prompt
+
+
+def generate_commit_message(diff, files, temperature=0.7, max_retries=3, use_cache=True, n=1):
+    """
+    Generate commit messages using OpenAI's API with retry logic.
+    
+    Args:
+        diff (str): The git diff text
+        files (list): List of changed files
+        temperature (float): Controls randomness in AI response (0.0-1.0)
+        max_retries (int): Maximum number of retry attempts
+        use_cache (bool): Return cached messages for an identical request
+        n (int): Number of messages to sample in a single request
+    
+    Returns:
+        list: Generated commit messages, or a list with a single error message
+    """
+    if not diff:
+        return ["No changes to analyze."]
     
-    return "Error: All retry attempts failed."
+    # Greedy sampling returns the same text for every choice, so ask for one
+    if temperature == 0:
+        n = 1
+    
+    # Return saved messages if this exact request was answered before
+    cache_key = cache.make_cache_key(diff, _SYSTEM_MSG_SHORT, _MODEL, temperature, n)
+    if use_cache:
+        cached_messages = cache.get_cached_messages(cache_key)
+        if cached_messages:
+            return cached_messages
+    
+    user_prompt = _build_user_prompt(diff, files)
+    
+    # Ask the API, retrying transient failures
+    contents, error = _call_with_retry(_SYSTEM_MSG_SHORT, user_prompt, max_tokens=100,
+                                       temperature=temperature, n=n,
+                                       max_retries=max_retries, stream=True,
+                                       label="commit message")
+    if error:
+        return [error]
+    
+    # Keep only the first line of each message and clean it up
+    commit_messages = [_clean_commit_message(content.strip().split('\n', 1)[0])
+                       for content in contents]
+    # Drop repeated suggestions, keeping the order they came back in
+    commit_messages = list(dict.fromkeys(commit_messages))
+    
+    cache.store_messages(cache_key, commit_messages)
+    return commit_messages
+
 
+def generate_detailed_commit_message(diff, files, temperature=0.7, max_retries=3, use_cache=True, n=1):
+    """
+    Generate detailed commit messages with header and body using OpenAI's API with retry logic.
+    
+    Args:
+        diff (str): The git diff text
+        files (list): List of changed files
+        temperature (float): Controls randomness in AI response (0.0-1.0)
+        max_retries (int): Maximum number of retry attempts
+        use_cache (bool): Return cached messages for an identical request
+        n (int): Number of messages to sample in a single request
+        
+    Returns:
+        list: Generated detailed commit messages, or a list with a single error message
+    """
+    if not diff:
+        return ["No changes to analyze."]
+    
+    # Greedy sampling returns the same text for every choice, so ask for one
+    if temperature == 0:
+        n = 1
+    
+    # Return saved messages if this exact request was answered before
+    cache_key = cache.make_cache_key(diff, _SYSTEM_MSG_DETAILED, _MODEL, temperature, n)
+    if use_cache:
+        cached_messages = cache.get_cached_messages(cache_key)
+        if cached_messages:
+            return cached_messages
+    
+    user_prompt = _build_user_prompt(diff, files)
+    
+    # Ask the API, retrying transient failures
+    contents, error = _call_with_retry(_SYSTEM_MSG_DETAILED, user_prompt, max_tokens=300,
+                                       temperature=temperature, n=n,
+                                       max_retries=max_retries,
+                                       label="detailed commit message")
+    if error:
+        return [error]
+    
+    commit_messages = [_clean_commit_message(content) for content in contents]
+    # Drop repeated suggestions, keeping the order they came back in
+    commit_messages = list(dict.fromkeys(commit_messages))
+    
+    cache.store_messages(cache_key, commit_messages)
+    return commit_messages
 
 
-def suggest_commit_message(count=1, temperature=0.7):
+def suggest_commit_message(count=1, temperature=0.7, use_cache=True, staged_diff=None):
     """
     Main function to suggest a commit message.
     
     Args:
         count (int): Number of suggestions to generate
         temperature (float): Controls randomness in AI response
+        use_cache (bool): Reuse cached messages for identical requests
+        staged_diff (tuple): Result of get_git_diff() to reuse, or None to
+            read the staged changes now
         
     Returns:
         list: List of suggested messages or list with single error message
     """
-    # Get the git diff
-    diff, files_or_error = get_git_diff()
+    # Get the git diff, unless the caller already has it
+    diff, files_or_error = staged_diff or get_git_diff()
     
     # If no diff is available, files_or_error will be an error message string
     if not diff:
@@ -578,30 +1025,27 @@ def suggest_commit_message(count=1, temperature=0.7):
     # If we reach here, files_or_error contains the list of files
     file_list = files_or_error
     
-    # Generate the requested number of suggestions
-    suggestions = []
-    for i in range(count):
-        # Vary temperature slightly for more diverse suggestions
-        temp = temperature + (i * 0.05)
-        message = generate_commit_message(diff, file_list, temperature=min(temp, 1.0))
-        suggestions.append(message)  # message should be a string
-        
-    return suggestions
+    # Sample all suggestions in a single API request
+    return generate_commit_message(diff, file_list, temperature=temperature,
+                                   use_cache=use_cache, n=count)
 
 
-def suggest_detailed_commit_message(count=1, temperature=0.7):
+def suggest_detailed_commit_message(count=1, temperature=0.7, use_cache=True, staged_diff=None):
     """
     Generate detailed commit messages with header and body.
     
     Args:
         count (int): Number of suggestions to generate
         temperature (float): Controls randomness in AI response
+        use_cache (bool): Reuse cached messages for identical requests
+        staged_diff (tuple): Result of get_git_diff() to reuse, or None to
+            read the staged changes now
         
     Returns:
         list: List of suggested detailed messages
     """
-    # Get the git diff
-    diff, files_or_error = get_git_diff()
+    # Get the git diff, unless the caller already has it
+    diff, files_or_error = staged_diff or get_git_diff()
     
     # If no diff is available, files_or_error will be an error message string
     if not diff:
@@ -610,21 +1054,153 @@ def suggest_detailed_commit_message(count=1, temperature=0.7):
     # If we reach here, files_or_error contains the list of files
     file_list = files_or_error
     
-    # Generate the requested number of detailed suggestions
-    suggestions = []
-    for i in range(count):
-        # Vary temperature slightly for more diverse suggestions
-        temp = temperature + (i * 0.05)
-        message = generate_detailed_commit_message(diff, file_list, temperature=min(temp, 1.0))
-        suggestions.append(message)
-        
-    return suggestions
+    # Sample all detailed suggestions in a single API request
+    return generate_detailed_commit_message(diff, file_list, temperature=temperature,
+                                            use_cache=use_cache, n=count)
+
+
+def suggest_detailed_commit_message_streaming(temperature=0.7, use_cache=True, staged_diff=None):
+    """
+    Generate one detailed commit message, yielding its text as it arrives.
+    
+    Args:
+        temperature (float): Controls randomness in AI response
+        use_cache (bool): Reuse a cached message for an identical request
+        staged_diff (tuple): Result of get_git_diff() to reuse, or None to
+            read the staged changes now
+    
+    Yields:
+        str: Pieces of the message text
+    
+    Returns:
+        str: Error message if the message could not be generated completely
+        (possibly after some pieces were yielded), otherwise None
+    """
+    # Get the git diff, unless the caller already has it
+    diff, files_or_error = staged_diff or get_git_diff()
+    
+    # If no diff is available, files_or_error will be an error message string
+    if not diff:
+        return files_or_error
+    
+    # A cached message is already complete, so hand it over in one piece
+    cache_key = cache.make_cache_key(diff, _SYSTEM_MSG_DETAILED, _MODEL, temperature, 1)
+    if use_cache:
+        cached_messages = cache.get_cached_messages(cache_key)
+        if cached_messages:
+            yield cached_messages[0]
+            return None
+    
+    user_prompt = _build_user_prompt(diff, files_or_error)
+    
+    message, error = yield from _stream_with_retry(_SYSTEM_MSG_DETAILED, user_prompt, max_tokens=300,
+                                                   temperature=temperature,
+                                                   label="detailed commit message")
+    if error:
+        return error
+    
+    cache.store_messages(cache_key, [_clean_commit_message(message)])
+    return None
 
 
 def execute_git_commit(message, is_detailed=False):
     """
     Execute git commit with the selected message.
     
+    The commit is written with GitPython unless signing is enabled or the
+    repository has commit hooks. GitPython only runs some hooks, and not
+    the way git does (see _COMMIT_HOOKS), so those cases go through
+    'git commit' itself.
+    
+    Args:
+        message (str): The commit message to use
+        is_detailed (bool): Whether the message has header and body
+    
+    Returns:
+        bool: True if commit was successful, False otherwise
+    """
+    try:
+        repo = git.Repo(".", search_parent_directories=True)
+        
+        # GitPython can't sign commits, and it skips prepare-commit-msg,
+        # ignores core.hooksPath and commits the index it loaded before
+        # pre-commit ran (dropping anything the hook restaged), so leave
+        # those commits to git itself
+        if _commit_signing_enabled(repo) or _has_commit_hooks(repo):
+            return _execute_git_commit_subprocess(message, is_detailed)
+        
+        # Refuse to create an empty commit, as 'git commit' would
+        if repo.head.is_valid() and repo.index.write_tree().binsha == repo.head.commit.tree.binsha:
+            click.secho("X Commit failed:", fg='red')
+            click.echo("Nothing to commit. Stage changes with 'git add <files>' first.")
+            return False
+        
+        # A detailed message already separates header and body with a blank line
+        commit = repo.index.commit(message.strip() + "\n")
+        
+        branch = "detached HEAD" if repo.head.is_detached else repo.active_branch.name
+        click.secho("+ Commit successful!", fg='green')
+        click.echo(f"[{branch} {commit.hexsha[:7]}] {commit.summary}")
+        return True
+    
+    except git.exc.InvalidGitRepositoryError:
+        click.secho("X Commit failed:", fg='red')
+        click.echo("Current directory is not a Git repository.")
+        return False
+    except Exception as e:
+        click.secho(f"X Error executing commit: {str(e)}", fg='red')
+        return False
+
+
+def _commit_signing_enabled(repo):
+    """
+    Check whether git is configured to sign every commit.
+    
+    Args:
+        repo (git.Repo): The repository to check
+    
+    Returns:
+        bool: True if commit.gpgsign is enabled
+    """
+    try:
+        value = repo.config_reader().get_value('commit', 'gpgsign', False)
+    except Exception:
+        return False
+    if isinstance(value, str):
+        return value.strip().lower() in ('true', 'yes', 'on', '1')
+    return bool(value)
+
+
+def _has_commit_hooks(repo):
+    """
+    Check whether 'git commit' would run any hooks in this repository.
+    
+    Args:
+        repo (git.Repo): The repository to check
+    
+    Returns:
+        bool: True if a pre-commit, prepare-commit-msg, commit-msg or
+        post-commit hook is installed
+    """
+    # core.hooksPath (set by install-global-hook) replaces .git/hooks
+    try:
+        hooks_dir = repo.config_reader().get_value('core', 'hooksPath', '')
+    except Exception:
+        hooks_dir = ''
+    if hooks_dir:
+        hooks_dir = os.path.join(repo.working_tree_dir or repo.git_dir,
+                                 os.path.expanduser(str(hooks_dir)))
+    else:
+        hooks_dir = os.path.join(repo.git_dir, 'hooks')
+    
+    return any(os.path.isfile(os.path.join(hooks_dir, name))
+               for name in _COMMIT_HOOKS)
+
+
+def _execute_git_commit_subprocess(message, is_detailed=False):
+    """
+    Execute 'git commit' as a subprocess with the selected message.
+    
     Args:
         message (str): The commit message to use
         is_detailed (bool): Whether the message has header and body
@@ -668,6 +1244,33 @@ def execute_git_commit(message, is_detailed=False):
         return False
 
 
+def _is_error_message(message):
+    """
+    Check whether a suggestion is actually an error or warning message.
+    
+    Args:
+        message: A value returned by the suggestion functions
+    
+    Returns:
+        bool: True if the value is an error/warning string
+    """
+    return isinstance(message, str) and message.startswith(_ERROR_PREFIXES)
+
+
+def _display_suggestion(message, label="", blank_line=False):
+    """
+    Print a suggestion between separator lines in a single write.
+    
+    Args:
+        message (str): The suggested commit message
+        label (str): Text printed before the first separator; end it with a
+            newline to put it on its own line
+        blank_line (bool): Add an empty line after the closing separator
+    """
+    end = "\n" if blank_line else ""
+    click.echo(f"{label}{_SEP60}\n{message}\n{_SEP60}{end}")
+
+
 def get_user_selection(suggestions, message_type="commit message"):
     """
     Display suggestions and get user selection.
@@ -686,11 +1289,7 @@ def get_user_selection(suggestions, message_type="commit message"):
     click.echo(f"\nGenerated {len(suggestions)} {message_type} suggestion(s):\n")
     
     for i, message in enumerate(suggestions):
-        click.secho(f"[{i+1}] ", fg='blue', nl=False)
-        click.echo("=" * 60)
-        click.echo(message)
-        click.echo("=" * 60)
-        click.echo("")
+        _display_suggestion(message, click.style(f"[{i+1}] ", fg='blue'), blank_line=True)
     
     # Get user choice
     while True:
@@ -742,20 +1341,8 @@ def cli():
     
     This tool analyzes your staged changes and suggests meaningful commit messages.
     """
-    # Try to load from multiple locations
-    if not os.getenv("OPENAI_API_KEY"):
-        # Path to .env file in the same directory as the script
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        env_path = os.path.join(script_dir, '.env')
-        
-        # Also check user's home directory
-        home_env_path = os.path.join(os.path.expanduser("~"), '.commit-assistant', '.env')
-        
-        # Try loading from both locations
-        if os.path.exists(home_env_path):
-            load_dotenv(home_env_path, override=True)
-        elif os.path.exists(env_path):
-            load_dotenv(env_path, override=True)
+    # The configuration .env file is loaded on first use (see _load_env)
+
 
 def sanitize_api_key(raw_input):
     """
@@ -774,28 +1361,39 @@ def sanitize_api_key(raw_input):
     raw_input = str(raw_input)
     
     # Remove all control characters (ASCII 0-31 except tab, newline, carriage return)
-    # This includes SYN (ASCII 22) and other problematic characters
-    sanitized = ''.join(char for char in raw_input 
-                       if ord(char) >= 32 or char in '\t\n\r')
+    # This includes SYN (ASCII 22) and other problematic characters, plus
+    # zero-width characters from copy-paste. Dropping non-ASCII afterwards
+    # leaves only printable characters.
+    sanitized = raw_input.translate(_SANITIZE_TRANSLATE).encode('ascii', 'ignore').decode('ascii')
     
-    # Normalize whitespace - strip leading/trailing and collapse internal whitespace
-    sanitized = ' '.join(sanitized.split())
+    # Normalize whitespace and remove any quotes that might have been added
+    sanitized = ' '.join(sanitized.split()).strip('\'"').strip()
     
-    # Remove any quotes that might have been added
-    sanitized = sanitized.strip('\'"')
+    return sanitized if sanitized else None
+
+
+def _has_min_unique(text, count):
+    """
+    Check whether a string contains at least a number of distinct characters.
     
-    # Additional cleanup for common copy-paste issues
-    # Remove zero-width characters
-    zero_width_chars = ['\u200b', '\u200c', '\u200d', '\ufeff']  # Zero-width space, ZWNJ, ZWJ, BOM
-    for char in zero_width_chars:
-        sanitized = sanitized.replace(char, '')
+    Stops scanning as soon as enough distinct characters have been seen.
     
-    # Remove any non-printable characters that might remain
-    sanitized = ''.join(char for char in sanitized if char in string.printable).strip()
+    Args:
+        text (str): String to inspect
+        count (int): Minimum number of distinct characters
     
-    return sanitized if sanitized else None
+    Returns:
+        bool: True if the string has at least count distinct characters
+    """
+    seen = set()
+    for char in text:
+        seen.add(char)
+        if len(seen) >= count:
+            return True
+    return False
 
 
+@functools.lru_cache(maxsize=64)
 def validate_api_key(api_key):
     """
     Validate API key format and content.
@@ -804,44 +1402,39 @@ def validate_api_key(api_key):
         api_key (str): API key to validate
         
     Returns:
-        dict: Validation result with 'valid' boolean and 'error' message if invalid
+        _KeyValidation: Result with 'valid' boolean and 'error' message if invalid
     """
     if not api_key:
-        return {'valid': False, 'error': 'API key is empty'}
+        return _KeyValidation(False, 'API key is empty')
     
     # Check for obvious placeholders
-    placeholders = [
-        'key', 'your_api_key', 'your_api_key_here', 'your_actual_api_key_here',
-        'sk-example', 'sk-placeholder', 'sk-your_key_here', 'insert_key_here'
-    ]
-    
-    if api_key.lower() in placeholders:
-        return {'valid': False, 'error': 'API key appears to be a placeholder'}
+    if api_key.lower() in _PLACEHOLDERS:
+        return _KeyValidation(False, 'API key appears to be a placeholder')
     
     # Check basic format
     if not api_key.startswith('sk-'):
-        return {'valid': False, 'error': "API key should start with 'sk-'"}
+        return _KeyValidation(False, "API key should start with 'sk-'")
     
     # Check length (OpenAI keys are typically around 51 characters)
     if len(api_key) < 40:
-        return {'valid': False, 'error': f'API key too short ({len(api_key)} chars). Expected ~51 characters'}
+        return _KeyValidation(False, f'API key too short ({len(api_key)} chars). Expected ~51 characters')
     
     if len(api_key) > 80:
-        return {'valid': False, 'error': f'API key too long ({len(api_key)} chars). Expected ~51 characters'}
+        return _KeyValidation(False, f'API key too long ({len(api_key)} chars). Expected ~51 characters')
     
     # Check for valid characters (OpenAI keys use alphanumeric + some symbols)
-    if not re.match(r'^sk-[a-zA-Z0-9\-_]+$', api_key):
-        return {'valid': False, 'error': 'API key contains invalid characters'}
+    if not _SK_KEY_RE.match(api_key):
+        return _KeyValidation(False, 'API key contains invalid characters')
     
     # Check for suspicious patterns
     if api_key.count('-') > 5:  # Too many dashes
-        return {'valid': False, 'error': 'API key has suspicious format (too many dashes)'}
+        return _KeyValidation(False, 'API key has suspicious format (too many dashes)')
     
     # Check for repeated characters (likely corrupted)
-    if len(set(api_key)) < 10:  # Too few unique characters
-        return {'valid': False, 'error': 'API key has too few unique characters'}
+    if not _has_min_unique(api_key, 10):  # Too few unique characters
+        return _KeyValidation(False, 'API key has too few unique characters')
     
-    return {'valid': True, 'error': None}
+    return _KeyValidation(True, None)
 
 
 def test_saved_configuration(env_path, expected_key):
@@ -856,25 +1449,9 @@ def test_saved_configuration(env_path, expected_key):
         dict: Test result with 'success' boolean and 'error' message if failed
     """
     try:
-        # Clear any existing environment variable
-        if 'OPENAI_API_KEY' in os.environ:
-            original_key = os.environ['OPENAI_API_KEY']
-            del os.environ['OPENAI_API_KEY']
-        else:
-            original_key = None
-        
-        # Try to load the saved file
-        from dotenv import load_dotenv
-        load_dotenv(env_path, override=True)
-        
-        # Get the loaded key
-        loaded_key = os.getenv('OPENAI_API_KEY')
-        
-        # Restore original environment
-        if original_key:
-            os.environ['OPENAI_API_KEY'] = original_key
-        elif 'OPENAI_API_KEY' in os.environ:
-            del os.environ['OPENAI_API_KEY']
+        # Read the key straight from the saved file
+        content = _read_env_text(env_path)
+        loaded_key = _extract_api_key_line(content) if content else None
         
         # Check if loading worked
         if not loaded_key:
@@ -896,8 +1473,7 @@ def clean_config():
     Remove saved configuration file.
     Windows-safe version.
     """
-    config_dir = os.path.join(os.path.expanduser("~"), '.commit-assistant')
-    env_path = os.path.join(config_dir, '.env')
+    env_path = _ENV_PATH
     
     if os.path.exists(env_path):
         click.echo(f"Found configuration file: {env_path}")
@@ -908,8 +1484,8 @@ def clean_config():
                 
                 # Remove directory if empty
                 try:
-                    if os.path.exists(config_dir) and not os.listdir(config_dir):
-                        os.rmdir(config_dir)
+                    if os.path.exists(_CONFIG_DIR) and not os.listdir(_CONFIG_DIR):
+                        os.rmdir(_CONFIG_DIR)
                         click.echo("Configuration directory removed.")
                 except OSError:
                     # Directory not empty or permission issue
@@ -931,33 +1507,31 @@ def debug_config():
     Show configuration file locations and status.
     Windows-safe version.
     """
+    # Show the environment as the other commands see it (the saved file
+    # can only be loaded when python-dotenv is installed)
+    if _has_ai_extras():
+        _load_env()
+    
     click.echo("Configuration Debug")
-    click.echo("=" * 40)
+    click.echo(_SEP40)
     
     # Home config file
-    home_config = os.path.join(os.path.expanduser("~"), '.commit-assistant', '.env')
+    home_config = _ENV_PATH
+    # List the small config directory once instead of stat-ing the file twice
+    try:
+        with os.scandir(_CONFIG_DIR) as entries:
+            home_exists = any(entry.name == '.env' and entry.is_file() for entry in entries)
+    except OSError:
+        home_exists = False
     click.echo(f"\nHome config: {home_config}")
-    click.echo(f"Exists: {os.path.exists(home_config)}")
+    click.echo(f"Exists: {home_exists}")
     
-    if os.path.exists(home_config):
+    if home_exists:
         try:
-            # Try UTF-8 first, fallback to other encodings
-            content = None
-            for encoding in ['utf-8', 'utf-8-sig', 'ascii', 'cp1252']:
-                try:
-                    with open(home_config, 'r', encoding=encoding) as f:
-                        content = f.read().strip()
-                    break
-                except UnicodeDecodeError:
-                    continue
-            
-            if content and 'OPENAI_API_KEY=' in content:
-                lines = content.split('\n')
-                for line in lines:
-                    if line.strip().startswith('OPENAI_API_KEY='):
-                        key_value = line.split('=', 1)[1]
-                        click.echo(f"Contains API key: {key_value[:15]}... (length: {len(key_value)})")
-                        break
+            content = _read_env_text(home_config)
+            key_value = _extract_api_key_line(content) if content else None
+            if key_value is not None:
+                click.echo(f"Contains API key: {key_value[:15]}... (length: {len(key_value)})")
             else:
                 click.echo("No OPENAI_API_KEY found or couldn't read file")
                 
@@ -966,28 +1540,16 @@ def debug_config():
     
     # Current directory .env
     current_env = os.path.abspath('.env')
+    current_exists = os.path.isfile(current_env)
     click.echo(f"\nCurrent dir .env: {current_env}")
-    click.echo(f"Exists: {os.path.exists(current_env)}")
+    click.echo(f"Exists: {current_exists}")
     
-    if os.path.exists(current_env):
+    if current_exists:
         try:
-            # Try UTF-8 first, fallback to other encodings
-            content = None
-            for encoding in ['utf-8', 'utf-8-sig', 'ascii', 'cp1252']:
-                try:
-                    with open(current_env, 'r', encoding=encoding) as f:
-                        content = f.read().strip()
-                    break
-                except UnicodeDecodeError:
-                    continue
-            
-            if content and 'OPENAI_API_KEY=' in content:
-                lines = content.split('\n')
-                for line in lines:
-                    if line.strip().startswith('OPENAI_API_KEY='):
-                        key_value = line.split('=', 1)[1]
-                        click.echo(f"Contains API key: {key_value[:15]}... (length: {len(key_value)})")
-                        break
+            content = _read_env_text(current_env)
+            key_value = _extract_api_key_line(content) if content else None
+            if key_value is not None:
+                click.echo(f"Contains API key: {key_value[:15]}... (length: {len(key_value)})")
             else:
                 click.echo("No OPENAI_API_KEY found or couldn't read file")
                 
@@ -1000,7 +1562,7 @@ def debug_config():
     if env_key:
         click.echo(f"Value: {env_key[:15]}... (length: {len(env_key)})")
     
-    click.echo("\n" + "=" * 40)
+    click.echo("\n" + _SEP40)
 
 
 
@@ -1010,7 +1572,8 @@ def debug_config():
 @click.option('--detailed', '-d', is_flag=True, help='Generate detailed commit with header and body')
 @click.option('--interactive', '-i', is_flag=True, help='Interactive mode: select and commit directly')
 @click.option('--auto-commit', '-a', is_flag=True, help='Auto-commit the first suggestion without prompting')
-def suggest(count, temp, detailed, interactive, auto_commit):
+@click.option('--no-cache', is_flag=True, help='Always ask the AI instead of reusing cached suggestions')
+def suggest(count, temp, detailed, interactive, auto_commit, no_cache):
     """
     Suggest commit messages based on staged changes.
     
@@ -1018,6 +1581,7 @@ def suggest(count, temp, detailed, interactive, auto_commit):
     Use --detailed for messages with both header and body.
     Use --interactive to select and commit directly.
     Use --auto-commit to automatically commit the first suggestion.
+    Use --no-cache to skip previously generated suggestions.
     """
     # Validate inputs
     count = max(1, min(5, count))
@@ -1033,26 +1597,32 @@ def suggest(count, temp, detailed, interactive, auto_commit):
     
     click.echo("Analyzing staged changes...")
     
+    use_cache = not no_cache
+    
+    # Read the staged changes once; regenerating only repeats the AI request
+    staged_diff = get_git_diff()
+    
     # Generate suggestions
     while True:  # Loop for regeneration
         if detailed:
-            suggestions = suggest_detailed_commit_message(count=count, temperature=temp)
+            suggestions = suggest_detailed_commit_message(count=count, temperature=temp,
+                                                          use_cache=use_cache,
+                                                          staged_diff=staged_diff)
             message_type = "detailed commit message"
         else:
-            suggestions = suggest_commit_message(count=count, temperature=temp)
+            suggestions = suggest_commit_message(count=count, temperature=temp,
+                                                 use_cache=use_cache,
+                                                 staged_diff=staged_diff)
             message_type = "commit message"
         
         # Check if we got an error or warning message
-        if len(suggestions) == 1 and isinstance(suggestions[0], str) and (suggestions[0].startswith("Error") or suggestions[0].startswith("No ")):
+        if len(suggestions) == 1 and _is_error_message(suggestions[0]):
             click.secho(suggestions[0], fg='yellow')
             return
         
         # Auto-commit mode
         if auto_commit:
-            click.echo(f"\nAuto-committing with suggestion:")
-            click.echo("=" * 60)
-            click.echo(suggestions[0])
-            click.echo("=" * 60)
+            _display_suggestion(suggestions[0], "\nAuto-committing with suggestion:\n")
             
             if click.confirm("\nProceed with this commit?", default=True):
                 success = execute_git_commit(suggestions[0], detailed)
@@ -1074,17 +1644,15 @@ def suggest(count, temp, detailed, interactive, auto_commit):
                 return
             elif choice == 'regenerate':
                 click.echo("Regenerating suggestions...")
-                # Vary temperature slightly for different results
+                # Vary temperature slightly and skip the cache for fresh results
                 temp = min(1.0, temp + 0.1)
+                use_cache = False
                 continue
             elif choice == 'copy':
                 return
             elif selected_message:
                 # Confirm and commit
-                click.echo(f"\nSelected message:")
-                click.echo("=" * 60)
-                click.echo(selected_message)
-                click.echo("=" * 60)
+                _display_suggestion(selected_message, "\nSelected message:\n")
                 
                 if click.confirm("\nCommit with this message?", default=True):
                     success = execute_git_commit(selected_message, detailed)
@@ -1109,11 +1677,7 @@ def suggest(count, temp, detailed, interactive, auto_commit):
             click.echo(f"\nGenerated {len(suggestions)} {message_type} suggestion(s):\n")
             
             for i, message in enumerate(suggestions):
-                click.secho(f"[{i+1}] ", fg='blue', nl=False)
-                click.echo("=" * 60)
-                click.echo(message)
-                click.echo("=" * 60)
-                click.echo("")
+                _display_suggestion(message, click.style(f"[{i+1}] ", fg='blue'), blank_line=True)
             
             # Provide usage instructions
             if detailed:
@@ -1130,7 +1694,8 @@ def suggest(count, temp, detailed, interactive, auto_commit):
 @cli.command()
 @click.option('--temp', '-t', default=0.7, help='Temperature (creativity) of suggestions, 0.0-1.0')
 @click.option('--detailed', '-d', is_flag=True, help='Generate detailed commit with header and body')
-def quick(temp, detailed):
+@click.option('--no-cache', is_flag=True, help='Always ask the AI instead of reusing a cached suggestion')
+def quick(temp, detailed, no_cache):
     """
     Quick commit: Generate one suggestion and commit immediately if approved.
     
@@ -1143,22 +1708,21 @@ def quick(temp, detailed):
     
     # Generate one suggestion
     if detailed:
-        suggestions = suggest_detailed_commit_message(count=1, temperature=temp)
+        suggestions = suggest_detailed_commit_message(count=1, temperature=temp,
+                                                      use_cache=not no_cache)
     else:
-        suggestions = suggest_commit_message(count=1, temperature=temp)
+        suggestions = suggest_commit_message(count=1, temperature=temp,
+                                             use_cache=not no_cache)
     
     # Check for errors
-    if len(suggestions) == 1 and isinstance(suggestions[0], str) and (suggestions[0].startswith("Error") or suggestions[0].startswith("No ")):
+    if len(suggestions) == 1 and _is_error_message(suggestions[0]):
         click.secho(suggestions[0], fg='yellow')
         return
     
     message = suggestions[0]
     
     # Display the suggestion
-    click.echo(f"\nSuggested commit message:")
-    click.echo("=" * 60)
-    click.echo(message)
-    click.echo("=" * 60)
+    _display_suggestion(message, "\nSuggested commit message:\n")
     
     # Confirm and commit
     if click.confirm("\nCommit with this message?", default=True):
@@ -1185,11 +1749,10 @@ def setup():
     Windows-safe version.
     """
     # Create config directory in user's home
-    config_dir = os.path.join(os.path.expanduser("~"), '.commit-assistant')
-    os.makedirs(config_dir, exist_ok=True)
+    os.makedirs(_CONFIG_DIR, exist_ok=True)
     
     # Path to .env file
-    env_path = os.path.join(config_dir, '.env')
+    env_path = _ENV_PATH
     
     # Check if .env already exists
     if os.path.exists(env_path):
@@ -1200,18 +1763,7 @@ def setup():
             return
     
     # Simple, clear instructions
-    click.echo("\n" + "=" * 60)
-    click.echo("OpenAI API Key Setup")
-    click.echo("=" * 60)
-    click.echo("Get your API key from: https://platform.openai.com/api-keys")
-    click.echo("")
-    click.echo("Your API key should:")
-    click.echo("  - Start with 'sk-'")
-    click.echo("  - Be a long string (can be 50-200+ characters)")
-    click.echo("  - You can copy-paste it here")
-    click.echo("")
-    click.echo("The input will be visible for easy copy-paste verification.")
-    click.echo("=" * 60)
+    click.echo(_SETUP_BANNER)
     
     # Get API key with simple, visible input
     api_key = None
@@ -1220,42 +1772,9 @@ def setup():
     for attempt in range(max_attempts):
         try:
             click.echo(f"\nAttempt {attempt + 1} of {max_attempts}")
-            
-            # Simple prompt - no hiding, works everywhere
-            raw_input = click.prompt("Paste your OpenAI API key here", type=str, default="")
-            
-            if not raw_input or not raw_input.strip():
-                click.secho("No input provided. Please paste your API key.", fg='yellow')
-                continue
-            
-            # Basic sanitization - just remove obvious problematic characters
-            api_key = sanitize_api_key_simple(raw_input)
-            
-            if not api_key:
-                click.secho("Could not process the input. Please try again.", fg='red')
-                continue
-            
-            # Show what we got
-            click.echo(f"\nReceived API key:")
-            click.echo(f"  Length: {len(api_key)} characters")
-            click.echo(f"  Starts with: {api_key[:10]}...")
-            click.echo(f"  Ends with: ...{api_key[-10:]}")
-            
-            # Basic validation
-            validation_result = validate_api_key_simple(api_key)
-            if not validation_result['valid']:
-                click.secho(f"Warning: {validation_result['warning']}", fg='yellow')
-                if not click.confirm("Continue anyway?", default=True):
-                    continue
-            else:
-                click.secho("API key format looks good!", fg='green')
-            
-            # Confirm before saving
-            if click.confirm("Save this API key?", default=True):
+            api_key = _get_api_key_once()
+            if api_key:
                 break
-            else:
-                api_key = None
-                continue
                 
         except KeyboardInterrupt:
             click.echo("\nSetup canceled by user.")
@@ -1264,7 +1783,6 @@ def setup():
             click.secho(f"Error: {str(e)}", fg='red')
             if attempt < max_attempts - 1:
                 click.echo("Please try again.")
-                continue
     
     if not api_key:
         click.secho("\nCould not get a valid API key.", fg='red')
@@ -1292,6 +1810,48 @@ def setup():
         show_manual_setup_instructions(env_path)
 
 
+def _get_api_key_once():
+    """
+    Ask for the API key once, then sanitize, validate and confirm it.
+    
+    Returns:
+        str: The API key to save, or None if the user should try again
+    """
+    # Simple prompt - no hiding, works everywhere
+    raw_input = click.prompt("Paste your OpenAI API key here", type=str, default="")
+    
+    if not raw_input or not raw_input.strip():
+        click.secho("No input provided. Please paste your API key.", fg='yellow')
+        return None
+    
+    # Basic sanitization - just remove obvious problematic characters
+    api_key = sanitize_api_key_simple(raw_input)
+    
+    if not api_key:
+        click.secho("Could not process the input. Please try again.", fg='red')
+        return None
+    
+    # Show what we got
+    click.echo(f"\nReceived API key:")
+    click.echo(f"  Length: {len(api_key)} characters")
+    click.echo(f"  Starts with: {api_key[:10]}...")
+    click.echo(f"  Ends with: ...{api_key[-10:]}")
+    
+    # Basic validation
+    validation_result = validate_api_key_simple(api_key)
+    if not validation_result.valid:
+        click.secho(f"Warning: {validation_result.warning}", fg='yellow')
+        if not click.confirm("Continue anyway?", default=True):
+            return None
+    else:
+        click.secho("API key format looks good!", fg='green')
+    
+    # Confirm before saving
+    if click.confirm("Save this API key?", default=True):
+        return api_key
+    return None
+
+
 def sanitize_api_key_simple(raw_input):
     """
     Simple API key sanitization that preserves the key while removing obvious problems.
@@ -1309,21 +1869,10 @@ def sanitize_api_key_simple(raw_input):
     # Convert to string and strip whitespace
     cleaned = str(raw_input).strip()
     
-    # Remove common problematic characters but preserve the key content
-    # Remove control characters (0-31) except tab/newline/carriage return
-    cleaned = ''.join(char for char in cleaned if ord(char) >= 32 or char in '\t\n\r')
-    
-    # Remove zero-width characters that can come from copy-paste
-    # Using basic string replacement instead of Unicode escapes
-    zero_width_chars = [
-        '\u200b',  # Zero width space
-        '\u200c',  # Zero width non-joiner
-        '\u200d',  # Zero width joiner
-        '\ufeff',  # Byte order mark
-        '\u2060'   # Word joiner
-    ]
-    for char in zero_width_chars:
-        cleaned = cleaned.replace(char, '')
+    # Remove common problematic characters but preserve the key content:
+    # control characters (0-31) except tab/newline/carriage return, and
+    # zero-width characters that can come from copy-paste
+    cleaned = cleaned.translate(_SANITIZE_TRANSLATE)
     
     # Remove quotes if the entire thing is wrapped in quotes
     if (cleaned.startswith('"') and cleaned.endswith('"')) or \
@@ -1339,6 +1888,7 @@ def sanitize_api_key_simple(raw_input):
     return cleaned if cleaned else None
 
 
+@functools.lru_cache(maxsize=64)
 def validate_api_key_simple(api_key):
     """
     Simple validation that doesn't restrict length but checks basic format.
@@ -1348,39 +1898,33 @@ def validate_api_key_simple(api_key):
         api_key (str): API key to validate
         
     Returns:
-        dict: Validation result with 'valid' boolean and 'warning' message
+        _SimpleKeyValidation: Result with 'valid' boolean and 'warning' message
     """
     if not api_key:
-        return {'valid': False, 'warning': 'API key is empty'}
+        return _SimpleKeyValidation(False, 'API key is empty')
     
     # Check for obvious placeholders
-    placeholders = [
-        'key', 'your_api_key', 'your_api_key_here', 'your_actual_api_key_here',
-        'sk-example', 'sk-placeholder', 'sk-your_key_here', 'insert_key_here',
-        'paste_your_key_here', 'replace_with_your_key'
-    ]
-    
-    if api_key.lower() in placeholders:
-        return {'valid': False, 'warning': 'This looks like a placeholder, not a real API key'}
+    if api_key.lower() in _SIMPLE_PLACEHOLDERS:
+        return _SimpleKeyValidation(False, 'This looks like a placeholder, not a real API key')
     
     # Check if it starts with sk-
     if not api_key.startswith('sk-'):
-        return {'valid': False, 'warning': "OpenAI API keys should start with 'sk-'"}
+        return _SimpleKeyValidation(False, "OpenAI API keys should start with 'sk-'")
     
     # Check minimum length (very basic check)
     if len(api_key) < 20:
-        return {'valid': False, 'warning': f'API key seems too short ({len(api_key)} chars)'}
+        return _SimpleKeyValidation(False, f'API key seems too short ({len(api_key)} chars)')
     
     # Check for reasonable character set (allow more flexibility)
     # Using basic character checking instead of regex
-    allowed_chars = set('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-_./+=')
-    suspicious_chars = [c for c in api_key if c not in allowed_chars]
-    
-    if suspicious_chars:
-        return {'valid': False, 'warning': f'API key contains unusual characters: {suspicious_chars[:5]}'}
+    if not _ALLOWED_KEY_CHARS.issuperset(api_key):
+        # Only collect the offending characters when reporting them
+        suspicious_chars = list(itertools.islice(
+            (c for c in api_key if c not in _ALLOWED_KEY_CHARS), 5))
+        return _SimpleKeyValidation(False, f'API key contains unusual characters: {suspicious_chars}')
     
     # All checks passed
-    return {'valid': True, 'warning': None}
+    return _SimpleKeyValidation(True, None)
 
 
 def save_api_key_to_file(env_path, api_key):
@@ -1395,31 +1939,28 @@ def save_api_key_to_file(env_path, api_key):
     # Create the content with Windows-safe line ending
     content = f"OPENAI_API_KEY={api_key}\n"
     
-    # Save with UTF-8 encoding
-    # Use 'w' mode which will use the system's default line endings
+    # Encode as UTF-8, falling back to ASCII if UTF-8 fails
     try:
-        with open(env_path, 'w', encoding='utf-8') as f:
-            f.write(content)
+        data = content.encode('utf-8')
     except UnicodeEncodeError:
-        # Fallback to ASCII if UTF-8 fails
-        with open(env_path, 'w', encoding='ascii', errors='ignore') as f:
-            f.write(content)
-    
-    # Verify the file was written correctly
+        data = content.encode('ascii', errors='ignore')
+    
+    # Write to a temporary file and move it into place, so an interrupted
+    # write never leaves a truncated config behind. Binary mode keeps the
+    # '\n' line ending on every platform. mkstemp picks an unused name and
+    # creates the file readable by the owner only, since it holds the key.
+    fd, tmp_path = tempfile.mkstemp(prefix='.env.', suffix='.tmp',
+                                    dir=os.path.dirname(env_path) or '.')
     try:
-        with open(env_path, 'r', encoding='utf-8') as f:
-            saved_content = f.read().strip()
-    except UnicodeDecodeError:
-        with open(env_path, 'r', encoding='ascii', errors='ignore') as f:
-            saved_content = f.read().strip()
-    
-    # Basic verification
-    if not saved_content.startswith('OPENAI_API_KEY='):
-        raise Exception("File verification failed - content doesn't match expected format")
-    
-    saved_key = saved_content.split('=', 1)[1]
-    if saved_key != api_key:
-        raise Exception("File verification failed - saved key doesn't match input key")
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, env_path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
 
 
 def test_api_key_loading(env_path):
@@ -1434,26 +1975,10 @@ def test_api_key_loading(env_path):
         bool: True if loading works, False otherwise
     """
     try:
-        # Save current environment
-        original_key = os.environ.get('OPENAI_API_KEY')
-        
-        # Clear environment variable
-        if 'OPENAI_API_KEY' in os.environ:
-            del os.environ['OPENAI_API_KEY']
-        
-        # Try to load from file
-        from dotenv import load_dotenv
-        load_dotenv(env_path, override=True)
-        
-        # Check if it loaded
-        loaded_key = os.getenv('OPENAI_API_KEY')
-        success = loaded_key is not None and len(loaded_key.strip()) > 0
-        
-        # Restore original environment
-        if original_key:
-            os.environ['OPENAI_API_KEY'] = original_key
-        elif 'OPENAI_API_KEY' in os.environ:
-            del os.environ['OPENAI_API_KEY']
+        # Read the key straight from the file; the environment is left alone
+        content = _read_env_text(env_path)
+        loaded_key = _extract_api_key_line(content) if content else None
+        success = bool(loaded_key)
         
         return success
         
@@ -1471,7 +1996,7 @@ def show_manual_setup_instructions(env_path):
         env_path (str): Path where .env file should be created
     """
     click.echo("\nManual Setup Instructions:")
-    click.echo("=" * 50)
+    click.echo(_SEP50)
     click.echo(f"1. Create this file: {env_path}")
     click.echo("2. Add this line to the file:")
     click.echo("   OPENAI_API_KEY=your_actual_api_key_here")
@@ -1479,7 +2004,7 @@ def show_manual_setup_instructions(env_path):
     click.echo("")
     click.echo("Alternative - Set environment variable:")
     
-    if platform.system() == "Windows":
+    if _IS_WINDOWS:
         click.echo("Windows Command Prompt:")
         click.echo("   set OPENAI_API_KEY=your_api_key")
         click.echo("")
@@ -1503,34 +2028,36 @@ def install_hook():
     Sets up a prepare-commit-msg hook to suggest messages automatically
     when you run 'git commit' (without -m flag).
     """
+    from . import hooks
+    
     click.echo("Installing Git hook...")
     
     success, message = hooks.install_git_hook()
     
     if success:
         click.secho("+ " + message, fg='green')
-        click.echo("\nThe hook is now installed! Here's how it works:")
-        click.echo("1. Stage your changes: git add .")
-        click.echo("2. Start a commit: git commit")
-        click.echo("3. Your editor will open with an AI-suggested message")
-        click.echo("4. Edit or accept the suggestion and save")
+        click.echo("\nThe hook is now installed! Here's how it works:\n"
+                   "1. Stage your changes: git add .\n"
+                   "2. Start a commit: git commit\n"
+                   "3. Your editor will open with an AI-suggested message\n"
+                   "4. Edit or accept the suggestion and save")
         
         # Check for Windows-specific notes
-        if platform.system() == "Windows":
-            click.echo("\n" + "="*50)
+        if _IS_WINDOWS:
+            click.echo("\n" + _SEP50)
             click.secho("Windows Users Note:", fg='yellow', bold=True)
-            click.echo("Make sure Git is configured to use the correct shell:")
-            click.echo("  git config --global core.autocrlf true")
-            click.echo("The hook will work with Git Bash, Git for Windows, and most Git clients.")
-            click.echo("="*50)
+            click.echo("Make sure Git is configured to use the correct shell:\n"
+                       "  git config --global core.autocrlf true\n"
+                       "The hook will work with Git Bash, Git for Windows, and most Git clients.")
+            click.echo(_SEP50)
             
     else:
         if "already exists" in message:
             click.secho("! " + message, fg='yellow')
-            click.echo("\nTo reinstall, first remove the existing hook:")
-            click.echo("  ai-commit-assistant uninstall-hook")
-            click.echo("Then install again:")
-            click.echo("  ai-commit-assistant install-hook")
+            click.echo("\nTo reinstall, first remove the existing hook:\n"
+                       "  ai-commit-assistant uninstall-hook\n"
+                       "Then install again:\n"
+                       "  ai-commit-assistant install-hook")
         else:
             click.secho("X " + message, fg='red')
 
@@ -1542,14 +2069,16 @@ def uninstall_hook():
     
     Removes the prepare-commit-msg hook installed by this tool.
     """
+    from . import hooks
+    
     click.echo("Removing Git hook...")
     
     success, message = hooks.uninstall_git_hook()
     
     if success:
         click.secho("✓ " + message, fg='green')
-        click.echo("Git hook has been removed. You can reinstall it anytime with:")
-        click.echo("  python -m commitassist.main install-hook")
+        click.echo("Git hook has been removed. You can reinstall it anytime with:\n"
+                   "  python -m commitassist.main install-hook")
     else:
         if "not found" in message:
             click.secho("ℹ " + message, fg='blue')
@@ -1565,27 +2094,29 @@ def install_global_hook():
     This sets up the hook to work in every Git repository on your system.
     You only need to run this once, not per repository.
     """
+    from . import hooks
+    
     click.echo("Installing global Git hook...")
     
     success, message = hooks.install_global_git_hook()
     
     if success:
         click.secho("+ " + message, fg='green')
-        click.echo("\nGlobal hook installed successfully!")
-        click.echo("\nThis hook will now work in ALL your Git repositories!")
-        click.echo("\nHow it works:")
-        click.echo("1. Go to any Git repository")
-        click.echo("2. Stage changes: git add .")
-        click.echo("3. Start commit: git commit")
-        click.echo("4. See AI suggestions in your editor")
-        
-        click.echo(f"\nHook location: {message.split(': ')[1]}")
-        
-        if platform.system() == "Windows":
-            click.echo("\n" + "="*50)
+        click.echo("\nGlobal hook installed successfully!\n"
+                   "\nThis hook will now work in ALL your Git repositories!\n"
+                   "\nHow it works:\n"
+                   "1. Go to any Git repository\n"
+                   "2. Stage changes: git add .\n"
+                   "3. Start commit: git commit\n"
+                   "4. See AI suggestions in your editor")
+        
+        click.echo(f"\nHook location: {message.partition(': ')[2]}")
+        
+        if _IS_WINDOWS:
+            click.echo("\n" + _SEP50)
             click.secho("Windows Users:", fg='yellow', bold=True)
             click.echo("Global hooks work with Git for Windows and most Git clients.")
-            click.echo("="*50)
+            click.echo(_SEP50)
             
     else:
         click.secho("X " + message, fg='red')
@@ -1599,67 +2130,85 @@ def uninstall_global_hook():
     This removes the global hook setup, but won't affect individual
     repository hooks that were installed separately.
     """
+    from . import hooks
+    
     click.echo("Removing global Git hook...")
     
     success, message = hooks.uninstall_global_git_hook()
     
     if success:
         click.secho("✓ " + message, fg='green')
-        click.echo("\nGlobal hook removed. You can:")
-        click.echo("1. Reinstall globally: python -m commitassist.main install-global-hook")
-        click.echo("2. Install per-repo: python -m commitassist.main install-hook")
+        click.echo("\nGlobal hook removed. You can:\n"
+                   "1. Reinstall globally: python -m commitassist.main install-global-hook\n"
+                   "2. Install per-repo: python -m commitassist.main install-hook")
     else:
         click.secho("✗ " + message, fg='red')
 
 
+@cli.command()
 def hook_status():
     """
     Check the status of Git hook installation (both local and global).
     """
-    click.echo("Git Hook Status Report:")
-    click.echo("=" * 60)
+    from . import hooks
+    style = click.style
+    
+    # The local and global checks are independent git/filesystem lookups,
+    # so run them side by side
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        local_future = executor.submit(hooks.check_git_hook_status)
+        global_future = executor.submit(hooks.check_global_hook_status)
+        local_status = local_future.result()
+        global_status = global_future.result()
+    
+    # Build the whole report and print it with a single write
+    parts = ["Git Hook Status Report:", _SEP60]
     
     # Check local hook status
-    click.secho("LOCAL REPOSITORY HOOK:", fg='blue', bold=True)
-    local_status = hooks.check_git_hook_status()
+    parts.append(style("LOCAL REPOSITORY HOOK:", fg='blue', bold=True))
     
     if not local_status['git_repo']:
-        click.secho("X Not in a Git repository", fg='red')
+        parts.append(style("X Not in a Git repository", fg='red'))
     elif local_status['hook_exists'] and local_status['is_our_hook']:
-        click.secho("+ Local hook installed", fg='green')
-        click.echo(f"Location: {local_status['hook_path']}")
+        parts.append(style("+ Local hook installed", fg='green'))
+        parts.append(f"Location: {local_status['hook_path']}")
     else:
-        click.secho("- No local hook", fg='red')
+        parts.append(style("- No local hook", fg='red'))
     
-    click.echo()
+    parts.append("")
     
     # Check global hook status
-    click.secho("GLOBAL HOOK (works in all repos):", fg='blue', bold=True)
-    global_status = hooks.check_global_hook_status()
+    parts.append(style("GLOBAL HOOK (works in all repos):", fg='blue', bold=True))
+    global_active = global_status['global_hooks_configured'] and global_status['is_our_hook']
     
-    if global_status['global_hooks_configured'] and global_status['is_our_hook']:
-        click.secho("+ Global hook installed and active", fg='green')
-        click.echo("Works in ALL Git repositories!")
-        click.echo(f"Location: {global_status['hook_path']}")
+    if global_active:
+        parts.append(style("+ Global hook installed and active", fg='green'))
+        parts.append("Works in ALL Git repositories!")
+        parts.append(f"Location: {global_status['hook_path']}")
     else:
-        click.secho("- No global hook", fg='red')
+        parts.append(style("- No global hook", fg='red'))
     
-    click.echo("=" * 60)
+    parts.append(_SEP60)
     
     # Recommendations
-    click.secho("RECOMMENDATIONS:", fg='yellow', bold=True)
+    parts.append(style("RECOMMENDATIONS:", fg='yellow', bold=True))
     
-    if global_status['global_hooks_configured'] and global_status['is_our_hook']:
-        click.echo("You're all set! Global hook works everywhere.")
+    if global_active:
+        parts.append("You're all set! Global hook works everywhere.")
     else:
-        click.echo("Install global hook for convenience:")
-        click.echo("   ai-commit-assistant install-global-hook")
-        click.echo("   (Works in all repositories, setup once)")
+        parts.extend([
+            "Install global hook for convenience:",
+            "   ai-commit-assistant install-global-hook",
+            "   (Works in all repositories, setup once)",
+        ])
     
-    click.echo()
-    click.echo("Alternative commands:")
-    click.echo("• Local hook:  ai-commit-assistant install-hook")
-    click.echo("• Global hook: ai-commit-assistant install-global-hook")
+    parts.extend([
+        "",
+        "Alternative commands:",
+        "• Local hook:  ai-commit-assistant install-hook",
+        "• Global hook: ai-commit-assistant install-global-hook",
+    ])
+    click.echo("\n".join(parts))
 
 
 @cli.command()
@@ -1667,33 +2216,38 @@ def global_hook_status():
     """
     Check the status of global Git hook installation.
     """
+    from . import hooks
+    style = click.style
+    
     status = hooks.check_global_hook_status()
     
-    click.echo("Global Git Hook Status:")
-    click.echo("=" * 50)
+    # Build the whole report and print it with a single write
+    parts = ["Global Git Hook Status:", _SEP50]
     
     if status.get('error'):
-        click.secho(f"✗ Error checking status: {status['error']}", fg='red')
+        parts.append(style(f"✗ Error checking status: {status['error']}", fg='red'))
+        click.echo("\n".join(parts))
         return
     
     if status['global_hooks_configured']:
-        click.secho("✓ Global Git hooks are configured", fg='green')
-        click.echo(f"Hooks path: {status['global_hooks_path']}")
+        parts.append(style("✓ Global Git hooks are configured", fg='green'))
+        parts.append(f"Hooks path: {status['global_hooks_path']}")
         
         if status['hook_exists'] and status['is_our_hook']:
-            click.secho("✓ Commit Assistant global hook is active", fg='green')
-            click.echo(f"Hook file: {status['hook_path']}")
-            click.echo("\n✨ The hook will work in ALL your Git repositories!")
+            parts.append(style("✓ Commit Assistant global hook is active", fg='green'))
+            parts.append(f"Hook file: {status['hook_path']}")
+            parts.append("\n✨ The hook will work in ALL your Git repositories!")
         elif status['hook_exists']:
-            click.secho("⚠ A global hook exists but wasn't created by commit-assistant", fg='yellow')
+            parts.append(style("⚠ A global hook exists but wasn't created by commit-assistant", fg='yellow'))
         else:
-            click.secho("✗ Global hook file missing", fg='red')
-            click.echo("Try reinstalling: python -m commitassist.main install-global-hook")
+            parts.append(style("✗ Global hook file missing", fg='red'))
+            parts.append("Try reinstalling: python -m commitassist.main install-global-hook")
     else:
-        click.secho("✗ Global Git hooks not configured", fg='red')
-        click.echo("Install with: python -m commitassist.main install-global-hook")
+        parts.append(style("✗ Global Git hooks not configured", fg='red'))
+        parts.append("Install with: python -m commitassist.main install-global-hook")
     
-    click.echo("=" * 50)
+    parts.append(_SEP50)
+    click.echo("\n".join(parts))
 
 # Debug command to test API connectivity
 @cli.command()
@@ -1703,30 +2257,33 @@ def test_api():
     Windows-safe version.
     """
     click.echo("Testing OpenAI API...")
-    click.echo("=" * 40)
+    click.echo(_SEP40)
+    
+    if not _has_ai_extras():
+        click.secho(_AI_EXTRAS_HINT, fg='red')
+        return
+    
+    env_get = os.environ.get
     
     try:
         # Show what key we're using
-        api_key = os.getenv("OPENAI_API_KEY")
+        api_key = env_get("OPENAI_API_KEY")
         if not api_key:
             # Try loading from config files
             from dotenv import load_dotenv
             
-            # Try current directory first
-            if os.path.exists('.env'):
-                load_dotenv('.env', override=True)
-                api_key = os.getenv("OPENAI_API_KEY")
-                if api_key:
-                    click.echo("Loaded API key from current directory .env")
-            
-            # Try home directory if not found
-            if not api_key:
-                home_env = os.path.join(os.path.expanduser("~"), '.commit-assistant', '.env')
-                if os.path.exists(home_env):
-                    load_dotenv(home_env, override=True)
-                    api_key = os.getenv("OPENAI_API_KEY")
+            # Try current directory first, then the home config. load_dotenv
+            # returns False for a missing file, so no separate exists check
+            sources = (
+                ('.env', "Loaded API key from current directory .env"),
+                (_ENV_PATH, f"Loaded API key from home config: {_ENV_PATH}"),
+            )
+            for env_path, loaded_message in sources:
+                if load_dotenv(env_path, override=True):
+                    api_key = env_get("OPENAI_API_KEY")
                     if api_key:
-                        click.echo(f"Loaded API key from home config: {home_env}")
+                        click.echo(loaded_message)
+                        break
         
         if not api_key:
             click.secho("No API key found!", fg='red')
@@ -1736,6 +2293,7 @@ def test_api():
         click.echo(f"Using API key: {api_key[:15]}... (length: {len(api_key)})")
         
         # Test the API
+        from openai import OpenAI
         client = OpenAI(api_key=api_key.strip())
         
         response = client.chat.completions.create(
@@ -1755,53 +2313,107 @@ def test_api():
     except Exception as e:
         click.secho(f"API test failed: {str(e)}", fg='red')
         
-        error_str = str(e).lower()
-        if "authentication" in error_str or "api key" in error_str:
-            click.echo("Check your API key with: ai-commit-assistant setup")
-        elif "quota" in error_str or "billing" in error_str:
-            click.echo("Check your OpenAI billing and usage limits")
-        elif "network" in error_str or "connection" in error_str:
-            click.echo("Check your internet connection")
-        else:
-            click.echo("Try: ai-commit-assistant setup")
+        # Pick the hint from the exception type rather than searching the message.
+        # isinstance() also covers subclasses such as APITimeoutError
+        import openai
+        hints = (
+            (openai.AuthenticationError, "Check your API key with: ai-commit-assistant setup"),
+            (openai.RateLimitError, "Check your OpenAI billing and usage limits"),
+            (openai.APIConnectionError, "Check your internet connection"),
+        )
+        click.echo(next((hint for error_type, hint in hints if isinstance(e, error_type)),
+                        "Try: ai-commit-assistant setup"))
+
+def _echo_commit_message(pieces):
+    """
+    Print a commit message piece by piece in the COMMIT MESSAGE block.
+    
+    The block is only opened once the first piece arrives, so an error
+    that happens before any text is printed on its own.
+    
+    Args:
+        pieces (iterator): Message text pieces; the iterator's return value
+            is an error message, or None if the message is complete
+    
+    Returns:
+        tuple: (message text printed, error_message or None)
+    """
+    chunks = []
+    while True:
+        try:
+            piece = next(pieces)
+        except StopIteration as stop:
+            error = stop.value
+            break
+        
+        if not chunks:
+            click.echo("\n" + _SEP70)
+            click.secho("COMMIT MESSAGE", fg='green', bold=True)
+            click.echo(_SEP70)
+        # click.echo flushes after every write, so each piece shows up at once
+        click.echo(piece, nl=False)
+        chunks.append(piece)
+    
+    if chunks:
+        click.echo()
+        click.echo(_SEP70)
+    return ''.join(chunks), error
+
 
 @cli.command()
-def commit():
+@click.option('--no-cache', is_flag=True, help='Always ask the AI instead of reusing a cached message')
+def commit(no_cache):
     """
     Generate a detailed commit message and format it for easy copying.
     
     This command generates a single detailed commit message optimized for copy-paste.
     """
     temp = 0.7
+    use_cache = not no_cache
     
     click.echo("Generating detailed commit message...")
     
-    suggestions = suggest_detailed_commit_message(count=1, temperature=temp)
-    
-    if len(suggestions) == 1 and isinstance(suggestions[0], str) and (suggestions[0].startswith("Error") or suggestions[0].startswith("No ")):
-        click.secho(suggestions[0], fg='yellow')
+    # Let a running daemon (python -m commitassist.daemon) answer if there is
+    # one; it keeps the OpenAI connection open between commands. Its errors
+    # are shown as they are, since it may already have called the API
+    staged_diff = get_git_diff()
+    suggestions = None
+    if staged_diff[0]:
+        from . import daemon
+        diff, files = staged_diff
+        suggestions = daemon.request_suggestions(diff, files, os.getcwd(), temperature=temp,
+                                                 use_cache=use_cache)
+    
+    if suggestions is not None:
+        if _is_error_message(suggestions[0]):
+            click.secho(suggestions[0], fg='yellow')
+            return
+        pieces = iter(suggestions[:1])
+    else:
+        # Show the message as the API writes it rather than after it is done
+        pieces = suggest_detailed_commit_message_streaming(temperature=temp,
+                                                           use_cache=use_cache,
+                                                           staged_diff=staged_diff)
+    
+    message, error = _echo_commit_message(pieces)
+    if error:
+        # A message cut off part way is no use to copy
+        click.secho(error, fg='yellow')
         return
     
-    message = suggestions[0]
+    message = _clean_commit_message(message)
     
     # Split into header and body for formatted output
-    lines = message.split('\n')
-    header = lines[0] if lines else ""
-    body = '\n'.join(lines[2:]) if len(lines) > 2 else ""  # Skip header and blank line
-    
-    click.echo("\n" + "=" * 70)
-    click.secho("COMMIT MESSAGE", fg='green', bold=True)
-    click.echo("=" * 70)
-    click.echo(message)
-    click.echo("=" * 70)
+    header, _, rest = message.partition('\n')
+    body = rest.partition('\n')[2]  # Skip the blank line after the header
     
-    click.echo("\n" + "=" * 70)
+    click.echo("\n" + _SEP70)
     click.secho("COPY-PASTE COMMANDS", fg='blue', bold=True)
-    click.echo("=" * 70)
+    click.echo(_SEP70)
     
     if body:
         click.echo("Option 1 - Using multiple -m flags:")
-        click.echo(f'git commit -m "{header}" -m "{body.replace(chr(10), chr(10))}"')
+        click.echo(f'git commit -m "{header}" -m "{body}"')
         
         click.echo("\nOption 2 - Using editor (recommended):")
         click.echo("git commit")
@@ -1815,7 +2427,7 @@ def commit():
         click.echo("Single line commit:")
         click.echo(f'git commit -m "{header}"')
     
-    click.echo("=" * 70)
+    click.echo(_SEP70)
 
 
 # Entry point for the command-line interface